@@ -1,4 +1,8 @@
 #!/usr/bin/env bash
 [ $CF_INSTANCE_INDEX -eq 0 ] && python manage.py migrate
 python manage.py collectstatic --noinput
-gunicorn -k gevent -w 4 -b 0.0.0.0:$PORT rules_service.wsgi
+if [ "$SERVER_INTERFACE" = "asgi" ]; then
+    gunicorn -k uvicorn.workers.UvicornWorker -w 4 -b 0.0.0.0:$PORT rules_service.asgi
+else
+    gunicorn -k gevent -w 4 -b 0.0.0.0:$PORT rules_service.wsgi
+fi
@@ -0,0 +1,154 @@
+"""
+In-memory index of the disasters open for registration on any date, and in
+any county.
+
+The registration windows of all application periods are swept into an
+interval index: the sorted dates on which the set of open periods changes,
+and the set of open periods from each of those dates until the next. Looking
+up a date is then a bisection. The index is rebuilt from the reference data
+snapshot (see `snapshot`) whenever a new one is loaded, and the disasters
+active today are kept until `timezone.localdate` moves on to the next day.
+"""
+import bisect
+import datetime
+from collections import defaultdict
+
+from django.utils import timezone
+
+from .snapshot import snapshots
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+class IntervalIndex:
+    """The periods open on each date, given `(period, begin, end)` windows
+    which include both their begin and end dates.
+    """
+    def __init__(self, windows):
+        starts = []
+        ends = []
+        for (period, begin, end) in windows:
+            if end < begin:
+                continue
+            starts.append((begin, period))
+            ends.append((end + ONE_DAY, period))
+        starts.sort()
+        ends.sort()
+
+        self.dates = sorted(
+            {begin for (begin, _) in starts} | {end for (end, _) in ends})
+        self.periods = []
+        open_periods = set()
+        current = frozenset()
+        i = j = 0
+        for date in self.dates:
+            changed = False
+            while j < len(ends) and ends[j][0] <= date:
+                open_periods.discard(ends[j][1])
+                j += 1
+                changed = True
+            while i < len(starts) and starts[i][0] <= date:
+                open_periods.add(starts[i][1])
+                i += 1
+                changed = True
+            if changed:
+                current = frozenset(open_periods)
+            self.periods.append(current)
+
+    def open_on(self, date):
+        """Return the periods open on the date."""
+        i = bisect.bisect_right(self.dates, date) - 1
+        if i < 0:
+            return frozenset()
+        return self.periods[i]
+
+
+class ActiveDisasters:
+    """An `IntervalIndex` of the application periods, with the disaster and
+    the counties of each period, built from `snapshot`.
+    """
+    def __init__(self, windows, counties, snapshot=None):
+        self.snapshot = snapshot
+        self.index = IntervalIndex(
+            (period, begin, end) for (period, _, begin, end) in windows)
+        self.disasters = {
+            period: disaster for (period, disaster, _, _) in windows}
+        self.county_periods = defaultdict(set)
+        for (period, county) in counties:
+            self.county_periods[county].add(period)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        periods = [
+            period
+            for disaster in snapshot.disasters.values()
+            for period in disaster.application_periods
+        ]
+        windows = [
+            (period.id, period.disaster_id, period.registration_begin_date,
+             period.registration_end_date)
+            for period in periods
+        ]
+        counties = [
+            (period.id, county.id)
+            for period in periods for county in period.counties
+        ]
+        return cls(windows, counties, snapshot)
+
+    def on(self, date):
+        """Return the ids of the disasters open for registration."""
+        return frozenset(
+            self.disasters[period] for period in self.index.open_on(date))
+
+    def in_county(self, county_id, date):
+        """Return the ids of the disasters open for registration in the
+        county.
+        """
+        periods = self.index.open_on(date) & self.county_periods.get(
+            county_id, frozenset())
+        return frozenset(self.disasters[period] for period in periods)
+
+
+class ActiveDisasterRegistry:
+    def __init__(self):
+        # (snapshot, ActiveDisasters), and
+        # (date, ActiveDisasters, disaster ids) for today, each replaced as a
+        # whole so that other threads never see them half updated
+        self._state = None
+        self._today = None
+
+    def current(self):
+        """Return the `ActiveDisasters`, rebuilt if reference data changed."""
+        snapshot = snapshots.current()
+        state = self._state
+        if state is None or state[0] is not snapshot:
+            state = (snapshot, ActiveDisasters.from_snapshot(snapshot))
+            self._state = state
+        return state[1]
+
+    def disaster_ids(self, date=None):
+        """Return the ids of the disasters open for registration on the
+        date, by default today.
+        """
+        active = self.current()
+        if date is not None:
+            return active.on(date)
+        today = timezone.localdate()
+        cached = self._today
+        if cached is None or cached[0] != today or cached[1] is not active:
+            cached = (today, active, active.on(today))
+            self._today = cached
+        return cached[2]
+
+    def county_disaster_ids(self, county_id, date=None):
+        """Return the ids of the disasters open for registration in the
+        county on the date, by default today.
+        """
+        return self.current().in_county(
+            county_id, date or timezone.localdate())
+
+    def invalidate(self):
+        self._state = None
+
+
+registry = ActiveDisasterRegistry()
@@ -3,3 +3,16 @@ from django.apps import AppConfig
 
 class DsnapRulesConfig(AppConfig):
     name = 'dsnap_rules'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import income_allotment_calculator, metrics, tracing
+        from . import signals  # noqa: F401
+
+        # Before anything compiles the eligibility plan
+        metrics.configure()
+        tracing.configure()
+
+        for path in getattr(settings, 'CALCULATOR_FILES', []):
+            income_allotment_calculator.load_calculators(path)
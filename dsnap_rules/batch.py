@@ -0,0 +1,134 @@
+"""
+Columnar evaluation of many applications for the same disaster at once.
+
+Payloads are loaded into NumPy column arrays and every rule of the eligibility
+rule tree is executed as array operations, which is much faster than running
+the compiled plan once per application for large re-determination runs.
+"""
+import numpy as np
+
+from .dsnap_rules import ELIGIBILITY_RULES
+
+BOOLEAN_FIELDS = (
+    "has_inaccessible_liquid_resources",
+    "has_lost_or_inaccessible_income",
+    "is_authorized_representative",
+    "is_head_of_household",
+    "purchased_or_plans_to_purchase_food",
+    "receives_SNAP_benefits",
+    "resided_in_disaster_area_at_disaster_time",
+    "worked_in_disaster_area_at_disaster_time",
+)
+
+
+class ApplicationColumns:
+    """The columnar counterpart of `DSNAPApplication`: each application field
+    is an array with one entry per payload. Optional booleans default to
+    `False`. The `integral_*` masks record which rows only held integers so
+    that findings render numbers the same way as the scalar rules.
+    """
+    def __init__(self, payloads):
+        if not isinstance(payloads, (list, tuple)):
+            payloads = list(payloads)
+        self.size = len(payloads)
+
+        for name in BOOLEAN_FIELDS:
+            setattr(self, name, np.fromiter(
+                (bool(payload.get(name, False)) for payload in payloads),
+                dtype=bool, count=self.size))
+
+        self.size_of_household = np.fromiter(
+            (payload["size_of_household"] for payload in payloads),
+            dtype=np.int64, count=self.size)
+        self.residence_state = np.array(
+            [payload["residence_state"] for payload in payloads],
+            dtype=object)
+        self.region_category = np.array(
+            [payload.get("region_category") for payload in payloads],
+            dtype=object)
+
+        self.total_take_home_income, integral_income = number_column(
+            [payload["total_take_home_income"] for payload in payloads])
+        self.accessible_liquid_resources, integral_resources = number_column(
+            [payload["accessible_liquid_resources"] for payload in payloads])
+        self.integral_income = integral_income & integral_resources
+
+        with_food_loss = []
+        without_food_loss = []
+        food_loss = []
+        for payload in payloads:
+            total = 0
+            without_food = 0
+            food = 0
+            for (k, v) in payload.get("disaster_expenses", {}).items():
+                total += v
+                if k == "food_loss":
+                    food = v
+                else:
+                    without_food += v
+            with_food_loss.append(total)
+            without_food_loss.append(without_food)
+            food_loss.append(food)
+        (self.disaster_expenses_with_food_loss,
+         self.integral_disaster_expenses) = number_column(with_food_loss)
+        (self.disaster_expenses_without_food_loss,
+         self.integral_disaster_expenses_without_food_loss) = number_column(
+            without_food_loss)
+        self.food_loss, self.integral_food_loss = number_column(food_loss)
+
+    def __len__(self):
+        return self.size
+
+    def deductible_disaster_expenses(self, include_food_loss):
+        if include_food_loss:
+            return self.disaster_expenses_with_food_loss
+        return self.disaster_expenses_without_food_loss
+
+
+def number_column(values):
+    """Return an array for the numeric values, using integers when every
+    value is an integer, along with a mask of the rows holding integers.
+    """
+    integral = np.fromiter(
+        (type(value) is int for value in values),
+        dtype=bool, count=len(values))
+    dtype = np.int64 if integral.all() else np.float64
+    return np.array(values, dtype=dtype), integral
+
+
+class BatchResult:
+    """The outcome of evaluating a batch of applications. `eligible` holds the
+    overall determination per row, `allotment` holds the allotment for rows
+    whose income is within the limit (and 0 otherwise), and `finding_codes`
+    maps each rule name to an array of indexes into that rule's
+    `finding_texts`. `errors` maps the index of each application that could
+    not be evaluated, e.g., for want of a calculator for its region category,
+    to the exception the scalar rules raise for it; those applications are not
+    eligible.
+    """
+    def __init__(self, column_result):
+        self._result = column_result
+        self.eligible = column_result.successful
+        self.errors = column_result.errors
+        allotment, has_allotment = column_result.metrics["allotment"]
+        self.allotment = np.where(has_allotment, allotment, 0)
+        self.finding_codes = {
+            rule.__class__.__name__: codes
+            for (rule, succeeded, codes, details) in column_result.findings
+        }
+
+    def __len__(self):
+        return len(self.eligible)
+
+    def result(self, index):
+        """Return the `Result` for a single application, identical to the one
+        produced by executing the scalar rules for it, or raise its error.
+        """
+        return self._result.row(index)
+
+
+def evaluate(payloads, disaster, rule=ELIGIBILITY_RULES):
+    """Evaluate validated application payloads that all belong to `disaster`.
+    """
+    columns = ApplicationColumns(payloads)
+    return BatchResult(rule.execute_columns(columns, disaster))
@@ -0,0 +1,132 @@
+"""
+Resumable re-determinations of NDJSON application files.
+
+`create_job` records the byte offsets of every chunk of the input file, and
+`work` claims chunks one at a time, evaluates them and stores their results,
+each in its own transaction, so that a job survives its workers being killed.
+Any number of workers may drain a job at once: chunks are claimed with
+`SELECT ... FOR UPDATE SKIP LOCKED`, and chunks claimed by a worker that has
+not finished them within `stale_after` seconds are claimed again.
+"""
+import os
+import socket
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .eligibility import get_disaster, iter_ndjson, render_determinations
+from .models import BatchChunk, BatchJob
+from .rules import ALL_FINDINGS
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_STALE_AFTER = 600
+
+
+def create_job(input_path, chunk_size=DEFAULT_CHUNK_SIZE, mode=ALL_FINDINGS):
+    """
+    Create a job for the NDJSON file, with chunks of `chunk_size` non-blank
+    lines.
+    """
+    input_path = os.path.abspath(input_path)
+    chunks = []
+    with open(input_path, "rb") as f:
+        start = offset = first_index = count = 0
+        for line in f:
+            offset += len(line)
+            if not line.strip():
+                continue
+            count += 1
+            if count == chunk_size:
+                chunks.append((start, offset, first_index))
+                start = offset
+                first_index += count
+                count = 0
+        if count:
+            chunks.append((start, offset, first_index))
+
+    with transaction.atomic():
+        job = BatchJob.objects.create(input_path=input_path, mode=mode)
+        BatchChunk.objects.bulk_create(
+            BatchChunk(job=job, number=number, start_offset=start,
+                       end_offset=end, first_index=first_index)
+            for (number, (start, end, first_index)) in enumerate(chunks))
+    return job
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_chunk(job, worker, stale_after=DEFAULT_STALE_AFTER):
+    """
+    Claim the next pending chunk of the job, or a chunk whose claim is stale,
+    for the worker. Returns None when there is nothing left to claim.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        chunk = BatchChunk.objects.select_for_update(skip_locked=True).filter(
+            Q(status=BatchChunk.PENDING) |
+            Q(status=BatchChunk.CLAIMED,
+              claimed_at__lt=now - timedelta(seconds=stale_after)),
+            job=job,
+        ).order_by('number').first()
+        if chunk is None:
+            return None
+
+        chunk.status = BatchChunk.CLAIMED
+        chunk.claimed_by = worker
+        chunk.claimed_at = now
+        chunk.save(update_fields=['status', 'claimed_by', 'claimed_at'])
+        BatchJob.objects.filter(pk=job.pk, status=BatchJob.PENDING).update(
+            status=BatchJob.RUNNING)
+    return chunk
+
+
+def evaluate_chunk(job, chunk):
+    """Return the NDJSON results of the chunk's applications."""
+    with open(job.input_path, "rb") as f:
+        f.seek(chunk.start_offset)
+        # Split only on newlines, as `create_job` counts lines
+        lines = f.read(chunk.end_offset - chunk.start_offset).split(b"\n")
+    return "".join(render_determinations(
+        iter_ndjson(lines), job.mode, get_disaster, chunk.first_index))
+
+
+def complete_chunk(chunk, worker, results):
+    """
+    Store the results of a chunk, unless another worker has claimed it since.
+    Returns whether the results were stored.
+    """
+    return BatchChunk.objects.filter(
+        pk=chunk.pk, status=BatchChunk.CLAIMED, claimed_by=worker,
+    ).update(status=BatchChunk.DONE, results=results) == 1
+
+
+def work(job, worker=None, stale_after=DEFAULT_STALE_AFTER):
+    """
+    Evaluate chunks of the job until none are left to claim. Returns the
+    number of chunks this worker completed.
+    """
+    worker = worker or worker_name()
+    completed = 0
+    while True:
+        chunk = claim_chunk(job, worker, stale_after)
+        if chunk is None:
+            break
+        if complete_chunk(chunk, worker, evaluate_chunk(job, chunk)):
+            completed += 1
+
+    if not job.chunks.exclude(status=BatchChunk.DONE).exists():
+        BatchJob.objects.filter(pk=job.pk).exclude(
+            status=BatchJob.COMPLETE).update(
+            status=BatchJob.COMPLETE, completed_at=timezone.now())
+    return completed
+
+
+def write_results(job, output):
+    """Write the results of a complete job to the file object, in order."""
+    for results in job.chunks.order_by('number').values_list(
+            'results', flat=True).iterator():
+        output.write(results)
@@ -0,0 +1,182 @@
+"""
+Bounded pool of database connections shared by the threads, or greenlets, of
+a process.
+
+Under `gunicorn -k gevent` every greenlet gets its own Django connection, so
+with a CONN_MAX_AGE each concurrent request keeps a database connection open.
+The `pooled_postgresql` backend instead takes a connection from a
+`ConnectionPool` when Django connects, and gives it back when Django closes
+it at the end of the request. The pool opens at most `max_size` connections;
+a request finding them all in use waits up to `timeout` seconds for one to be
+given back, then fails with `PoolTimeout`. Connections which have been idle
+for more than `check_after` seconds are checked before they are handed out,
+and replaced if the check fails.
+
+Waiting uses `threading.Condition`, which gevent's monkey patching makes
+cooperative, so a waiting greenlet lets the others run.
+"""
+import threading
+import time
+from collections import deque
+
+DEFAULT_MAX_SIZE = 10
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_CHECK_AFTER = 30.0
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Connections opened by `connect`, at most `max_size` at a time. `check`
+    raises, or returns False, for a connection which can no longer be used,
+    and `reset` returns a connection to its initial state, raising if it
+    cannot.
+    """
+    def __init__(self, connect, max_size=DEFAULT_MAX_SIZE,
+                 timeout=DEFAULT_TIMEOUT, check_after=DEFAULT_CHECK_AFTER,
+                 check=None, reset=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self.check = check
+        self.reset = reset
+        self._condition = threading.Condition()
+        # (connection, time it was given back), the most recent last
+        self._idle = deque()
+        self._size = 0
+        self._waiting = 0
+        self.created = 0
+        self.timeouts = 0
+
+    def get(self, connect=None):
+        """
+        Return an idle connection, or a new one if there is none and the pool
+        is not full; otherwise wait for a connection to be given back.
+        `connect` overrides the pool's own for a new connection.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                if self._idle:
+                    # The most recently used connection is the least likely
+                    # to have been dropped
+                    (connection, returned_at) = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    connection = None
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection was available within "
+                        f"{self.timeout} seconds")
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        if connection is not None:
+            if (time.monotonic() - returned_at < self.check_after
+                    or self._usable(connection)):
+                return connection
+            close_quietly(connection)
+
+        # This holds a place in the pool, which is given up if connecting
+        # fails
+        try:
+            connection = (connect or self.connect)()
+        except BaseException:
+            self._release()
+            raise
+        with self._condition:
+            self.created += 1
+        return connection
+
+    def put(self, connection, discard=False):
+        """
+        Give back a connection taken from the pool, closing it instead if
+        `discard` is true or it cannot be reset.
+        """
+        if not discard and self.reset is not None:
+            try:
+                self.reset(connection)
+            except Exception:
+                discard = True
+        if discard:
+            close_quietly(connection)
+            self._release()
+            return
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def close(self):
+        """Close the idle connections."""
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for (connection, _) in idle:
+            close_quietly(connection)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiting": self._waiting,
+                "created": self.created,
+                "timeouts": self.timeouts,
+            }
+
+    def _usable(self, connection):
+        if self.check is None:
+            return True
+        try:
+            return self.check(connection) is not False
+        except Exception:
+            return False
+
+    def _release(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+# Pools of this process by (database alias, server, database, user), so that
+# Django's test databases get pools of their own
+pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, connect, **options):
+    """Return the pool for the key, created with the options if needed."""
+    pool = pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = pools.get(key)
+            if pool is None:
+                pool = pools[key] = ConnectionPool(connect, **options)
+    return pool
+
+
+def close_all():
+    """Close the idle connections of every pool."""
+    for pool in list(pools.values()):
+        pool.close()
@@ -0,0 +1,56 @@
+"""
+Lookup of the disasters used by the eligibility rules, from the reference
+data snapshot (see `snapshot`). A new snapshot is loaded whenever the
+reference data version changes, and the model signals in `signals.py` also
+drop the snapshot whenever a disaster or state is saved or deleted.
+
+The version of the snapshot holding a disaster is the disaster's version,
+which `result_cache` includes in its keys so that results computed from
+older reference data are not reused.
+"""
+from asgiref.sync import sync_to_async
+
+from . import reference_data
+from .snapshot import snapshots
+
+
+class DisasterCache:
+    def __init__(self, snapshots=snapshots):
+        self._snapshots = snapshots
+
+    def get(self, disaster_id):
+        """
+        Return the disaster, with its state, for the id. Raises
+        `Disaster.DoesNotExist` if there is no such disaster.
+        """
+        return self._snapshots.current().get(disaster_id)
+
+    async def aget(self, disaster_id):
+        """
+        Asynchronous version of `get`, which only leaves the event loop when
+        the snapshot may need to be loaded.
+        """
+        snapshot = self._snapshots.loaded()
+        if (snapshot is None
+                or snapshot.version != reference_data.cached_version()):
+            snapshot = await sync_to_async(self._snapshots.current)()
+        return snapshot.get(disaster_id)
+
+    def version(self, disaster_id):
+        """
+        Return the version of the disaster, or None if it is not in the
+        current snapshot or the snapshot has not been loaded. This never
+        queries the database.
+        """
+        snapshot = self._snapshots.loaded()
+        if (snapshot is not None and disaster_id in snapshot.disasters
+                and snapshot.version == reference_data.cached_version()):
+            return snapshot.version
+        return None
+
+    def invalidate(self, disaster_id=None):
+        """Drop the snapshot, whichever disaster changed."""
+        self._snapshots.invalidate()
+
+
+disasters = DisasterCache()
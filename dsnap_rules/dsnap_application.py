@@ -1,14 +1,84 @@
 class DSNAPApplication:
+    """
+    The facts of a single D-SNAP application, built once from a validated
+    payload. Disaster expense totals are computed up front so that rules can
+    read them as plain attributes.
+    """
+    __slots__ = (
+        'accessible_liquid_resources',
+        'disaster_expenses',
+        'disaster_expenses_with_food_loss',
+        'disaster_expenses_without_food_loss',
+        'food_loss',
+        'has_inaccessible_liquid_resources',
+        'has_lost_or_inaccessible_income',
+        'is_authorized_representative',
+        'is_head_of_household',
+        'purchased_or_plans_to_purchase_food',
+        'receives_SNAP_benefits',
+        'region_category',
+        'resided_in_disaster_area_at_disaster_time',
+        'residence_state',
+        'size_of_household',
+        'total_take_home_income',
+        'worked_in_disaster_area_at_disaster_time',
+    )
+
+    accessible_liquid_resources: float
+    disaster_expenses: dict
+    disaster_expenses_with_food_loss: float
+    disaster_expenses_without_food_loss: float
+    food_loss: float
+    has_inaccessible_liquid_resources: bool
+    has_lost_or_inaccessible_income: bool
+    is_authorized_representative: bool
+    is_head_of_household: bool
+    purchased_or_plans_to_purchase_food: bool
+    receives_SNAP_benefits: bool
+    region_category: str
+    resided_in_disaster_area_at_disaster_time: bool
+    residence_state: str
+    size_of_household: int
+    total_take_home_income: float
+    worked_in_disaster_area_at_disaster_time: bool
+
     def __init__(self, payload):
-        self.__dict__ = payload
+        get = payload.get
+        self.accessible_liquid_resources = get('accessible_liquid_resources')
+        self.has_inaccessible_liquid_resources = get(
+            'has_inaccessible_liquid_resources')
+        self.has_lost_or_inaccessible_income = get(
+            'has_lost_or_inaccessible_income')
+        self.is_authorized_representative = get(
+            'is_authorized_representative', False)
+        self.is_head_of_household = get('is_head_of_household')
+        self.purchased_or_plans_to_purchase_food = get(
+            'purchased_or_plans_to_purchase_food')
+        self.receives_SNAP_benefits = get('receives_SNAP_benefits')
+        self.region_category = get('region_category')
+        self.resided_in_disaster_area_at_disaster_time = get(
+            'resided_in_disaster_area_at_disaster_time')
+        self.residence_state = get('residence_state')
+        self.size_of_household = get('size_of_household')
+        self.total_take_home_income = get('total_take_home_income')
+        self.worked_in_disaster_area_at_disaster_time = get(
+            'worked_in_disaster_area_at_disaster_time')
 
-    def deductible_disaster_expenses(self, include_food_loss):
-        total = 0
+        self.disaster_expenses = get('disaster_expenses', {})
+        with_food_loss = 0
+        without_food_loss = 0
+        food_loss = 0
         for (k, v) in self.disaster_expenses.items():
-            if k == "food_loss" and not include_food_loss:
-                continue
-            total += v
-        return total
+            with_food_loss += v
+            if k == "food_loss":
+                food_loss = v
+            else:
+                without_food_loss += v
+        self.disaster_expenses_with_food_loss = with_food_loss
+        self.disaster_expenses_without_food_loss = without_food_loss
+        self.food_loss = food_loss
 
-    def food_loss(self):
-        return self.disaster_expenses.get('food_loss', 0)
+    def deductible_disaster_expenses(self, include_food_loss):
+        if include_food_loss:
+            return self.disaster_expenses_with_food_loss
+        return self.disaster_expenses_without_food_loss
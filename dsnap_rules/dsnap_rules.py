@@ -1,5 +1,8 @@
-from . import income_allotment_calculator
-from .rules import Result, Rule, SimplePredicateRule
+import numpy as np
+
+from . import income_allotment_calculator, tracing
+from .income_allotment_calculator import CalculatorNotFound
+from .rules import And, ColumnResult, Result, Rule, SimplePredicateRule
 
 
 class AuthorizedRule(SimplePredicateRule):
@@ -10,6 +13,10 @@ class AuthorizedRule(SimplePredicateRule):
         return (application.is_head_of_household
                 or application.is_authorized_representative)
 
+    def predicate_columns(self, columns, disaster):
+        return (columns.is_head_of_household
+                | columns.is_authorized_representative)
+
 
 class FoodPurchaseRule(SimplePredicateRule):
     """
@@ -25,6 +32,9 @@ class FoodPurchaseRule(SimplePredicateRule):
     def predicate(self, application, disaster):
         return application.purchased_or_plans_to_purchase_food
 
+    def predicate_columns(self, columns, disaster):
+        return columns.purchased_or_plans_to_purchase_food
+
 
 class AdverseEffectRule(SimplePredicateRule):
     """
@@ -46,6 +56,14 @@ class AdverseEffectRule(SimplePredicateRule):
                 application, disaster)
         )
 
+    def predicate_columns(self, columns, disaster):
+        adverse_effect = (columns.has_lost_or_inaccessible_income
+                          | columns.has_inaccessible_liquid_resources)
+        if disaster.uses_DSED:
+            return adverse_effect
+        return adverse_effect | (columns.deductible_disaster_expenses(
+            disaster.allows_food_loss_alone) > 0)
+
     def incurred_deductible_disaster_expenses(self, application, disaster):
         if disaster.uses_DSED:
             return False
@@ -88,6 +106,31 @@ class DisasterAreaResidencyRule(Rule):
 
         return Result(result, self.assemble_findings(result, finding))
 
+    @property
+    def finding_texts(self):
+        return (self.resided_finding, self.worked_eligible_finding,
+                self.worked_ineligible_finding, self.failure_finding)
+
+    def static_findings(self):
+        return (self.assemble_findings(True, self.resided_finding)
+                + self.assemble_findings(True, self.worked_eligible_finding)
+                + self.assemble_findings(
+                    False, self.worked_ineligible_finding)
+                + self.assemble_findings(False, self.failure_finding))
+
+    def execute_columns(self, columns, disaster):
+        resided = columns.resided_in_disaster_area_at_disaster_time
+        worked = columns.worked_in_disaster_area_at_disaster_time & ~resided
+        codes = np.full(columns.size, 3, dtype='int8')
+        if disaster.residency_required:
+            codes[worked] = 2
+            successful = resided.copy()
+        else:
+            codes[worked] = 1
+            successful = resided | worked
+        codes[resided] = 0
+        return ColumnResult(successful, [(self, successful, codes, None)])
+
 
 class StateResidencyRule(SimplePredicateRule):
     """
@@ -101,6 +144,9 @@ class StateResidencyRule(SimplePredicateRule):
     def predicate(self, application, disaster):
         return (application.residence_state == disaster.state.abbreviation)
 
+    def predicate_columns(self, columns, disaster):
+        return columns.residence_state == disaster.state.abbreviation
+
 
 class SNAPSupplementalBenefitsRule(SimplePredicateRule):
     """
@@ -114,6 +160,9 @@ class SNAPSupplementalBenefitsRule(SimplePredicateRule):
     def predicate(self, application, disaster):
         return not application.receives_SNAP_benefits
 
+    def predicate_columns(self, columns, disaster):
+        return ~columns.receives_SNAP_benefits
+
 
 class IncomeAndResourceRule(Rule):
     """
@@ -128,6 +177,10 @@ class IncomeAndResourceRule(Rule):
     household, provided that food loss alone is not the only qualifying
     expense.
     """
+    finding_texts = (
+        "Disaster Gross Income {gross_income} within limit of {income_limit}",
+        "Disaster Gross Income {gross_income} exceeds limit of {income_limit}",
+    )
 
     def execute(self, application, disaster):
         gross_income = self.disaster_gross_income(application, disaster)
@@ -148,6 +201,36 @@ class IncomeAndResourceRule(Rule):
             metrics = {}
         return Result(result, self.assemble_findings(result, finding), metrics)
 
+    def execute_columns(self, columns, disaster):
+        gross_income = self.disaster_gross_income_columns(columns, disaster)
+        income_limit, allotment, errors = self.get_limits_and_allotments(
+            columns, disaster)
+        successful = gross_income <= income_limit
+        successful[list(errors)] = False
+        codes = (~successful).astype('int8')
+        integral = columns.integral_income
+        if not disaster.uses_DSED:
+            integral = integral & self.integral_disaster_expenses_columns(
+                columns, disaster)
+        details = {
+            "gross_income": gross_income,
+            "income_limit": income_limit,
+            "integral": integral,
+        }
+        return ColumnResult(
+            successful,
+            [(self, successful, codes, details)],
+            {"allotment": (allotment, successful)},
+            errors)
+
+    def finding_text(self, code, details, index):
+        gross_income = details["gross_income"][index].item()
+        if details["integral"][index]:
+            gross_income = int(gross_income)
+        return self.finding_texts[code].format(
+            gross_income=gross_income,
+            income_limit=details["income_limit"][index].item())
+
     def disaster_gross_income(self, application, disaster):
         return (
             application.total_take_home_income
@@ -159,16 +242,86 @@ class IncomeAndResourceRule(Rule):
 
     def food_loss_adjusted_disaster_expenses(self, application, disaster):
         if disaster.allows_food_loss_alone:
-            return application.deductible_disaster_expenses(True)
-        disaster_expenses = application.deductible_disaster_expenses(False)
+            return application.disaster_expenses_with_food_loss
+        disaster_expenses = application.disaster_expenses_without_food_loss
         if disaster_expenses > 0:
-            disaster_expenses += application.food_loss()
+            disaster_expenses += application.food_loss
         return disaster_expenses
 
+    def disaster_gross_income_columns(self, columns, disaster):
+        income = (columns.total_take_home_income
+                  + columns.accessible_liquid_resources)
+        if disaster.uses_DSED:
+            return income
+        if disaster.allows_food_loss_alone:
+            return income - columns.disaster_expenses_with_food_loss
+        disaster_expenses = columns.disaster_expenses_without_food_loss
+        return income - (disaster_expenses + np.where(
+            disaster_expenses > 0, columns.food_loss, 0))
+
+    def integral_disaster_expenses_columns(self, columns, disaster):
+        """
+        Return which rows only held integers among the expenses that
+        `disaster_gross_income_columns` deducts.
+        """
+        if disaster.allows_food_loss_alone:
+            return columns.integral_disaster_expenses
+        return columns.integral_disaster_expenses_without_food_loss & (
+            columns.integral_food_loss
+            | (columns.disaster_expenses_without_food_loss <= 0))
+
+    def get_limits_and_allotments(self, columns, disaster):
+        """
+        Return the limits and allotments of the rows, along with the
+        `CalculatorNotFound` error of each row whose region category has no
+        calculator, by row. Those rows have a limit and allotment of 0.
+        """
+        region_categories = set(columns.region_category.tolist())
+        if len(region_categories) == 1:
+            try:
+                calculator = income_allotment_calculator.get_calculator(
+                                disaster, region_categories.pop())
+            except CalculatorNotFound as e:
+                zeros = np.zeros(columns.size, dtype=np.int64)
+                return zeros, zeros.copy(), dict.fromkeys(
+                    range(columns.size), e)
+            limits, allotments = calculator.get_limits_and_allotments(
+                columns.size_of_household)
+            return limits, allotments, {}
+
+        limits = np.zeros(columns.size, dtype=np.int64)
+        allotments = np.zeros(columns.size, dtype=np.int64)
+        errors = {}
+        for region_category in region_categories:
+            rows = columns.region_category == region_category
+            try:
+                calculator = income_allotment_calculator.get_calculator(
+                                disaster, region_category)
+            except CalculatorNotFound as e:
+                errors.update(dict.fromkeys(np.flatnonzero(rows).tolist(), e))
+                continue
+            limits[rows], allotments[rows] = \
+                calculator.get_limits_and_allotments(
+                    columns.size_of_household[rows])
+        return limits, allotments, errors
+
     def get_limit_and_allotment(self, application, disaster):
-        calculator = income_allotment_calculator.get_calculator(
-                        disaster)
-        return (
-            calculator.get_limit(application.size_of_household),
-            calculator.get_allotment(application.size_of_household)
-        )
+        with tracing.span("calculator"):
+            calculator = income_allotment_calculator.get_calculator(
+                            disaster,
+                            getattr(application, "region_category", None))
+        return calculator.get_limit_and_allotment(
+            application.size_of_household)
+
+
+ELIGIBILITY_RULES = And(
+    AuthorizedRule(),
+    AdverseEffectRule(),
+    FoodPurchaseRule(),
+    DisasterAreaResidencyRule(),
+    StateResidencyRule(),
+    SNAPSupplementalBenefitsRule(),
+    IncomeAndResourceRule()
+)
+
+ELIGIBILITY_PLAN = ELIGIBILITY_RULES.compile()
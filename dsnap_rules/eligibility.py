@@ -0,0 +1,103 @@
+import json
+
+from .disaster_cache import disasters
+from .dsnap_application import DSNAPApplication
+from .dsnap_rules import ELIGIBILITY_PLAN
+from .income_allotment_calculator import CalculatorNotFound
+from .metrics import NULL_CLOCK
+from .models import Disaster
+from .renderers import renderer
+from .rules import ALL_FINDINGS
+from .validate import validate
+
+# Marker for NDJSON lines that could not be parsed
+InvalidJSON = object()
+
+
+def get_disaster(disaster_id):
+    return disasters.get(disaster_id)
+
+
+def determine(payload, get_disaster=get_disaster, mode=ALL_FINDINGS,
+              clock=NULL_CLOCK):
+    """
+    Validate a single application payload and evaluate it against the
+    eligibility rules for its disaster. Returns an HTTP status code and the
+    body of the determination, or of the error message. The stages are timed
+    with `clock` (see `metrics.stage_clock`).
+    """
+    valid, messages = validate(payload)
+    clock.lap("validate")
+    if not valid:
+        return 400, {"message": messages}
+
+    try:
+        disaster = get_disaster(payload["disaster_id"])
+    except Disaster.DoesNotExist:
+        return disaster_not_found(payload)
+    clock.lap("disaster")
+
+    return evaluate(payload, disaster, mode, clock)
+
+
+async def adetermine(payload, mode=ALL_FINDINGS):
+    """
+    Asynchronous version of `determine`, which looks the disaster up through
+    the async ORM when it is not cached. Evaluating the rules takes
+    microseconds, so it runs on the event loop.
+    """
+    valid, messages = validate(payload)
+    if not valid:
+        return 400, {"message": messages}
+
+    try:
+        disaster = await disasters.aget(payload["disaster_id"])
+    except Disaster.DoesNotExist:
+        return disaster_not_found(payload)
+
+    return evaluate(payload, disaster, mode)
+
+
+def disaster_not_found(payload):
+    return 404, {"message": "Disaster {} not found".format(
+        payload["disaster_id"])}
+
+
+def evaluate(payload, disaster, mode=ALL_FINDINGS, clock=NULL_CLOCK):
+    application = DSNAPApplication(payload)
+    try:
+        result = ELIGIBILITY_PLAN.execute(application, disaster, mode)
+    except CalculatorNotFound as e:
+        return 400, {"message": [str(e)]}
+    clock.lap("evaluate")
+    return 200, {
+        "eligible": result.successful,
+        "findings": result.findings,
+        "metrics": result.metrics,
+        "state": disaster.state.abbreviation
+    }
+
+
+def iter_ndjson(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield InvalidJSON
+
+
+def render_determinations(payloads, mode, get_disaster, start=0):
+    """
+    Yield an NDJSON line with the determination of each payload, numbering
+    them from `start`.
+    """
+    for index, payload in enumerate(payloads, start):
+        if payload is InvalidJSON:
+            status, body = 400, {"message": ["Invalid JSON"]}
+        else:
+            status, body = determine(payload, get_disaster, mode)
+        yield renderer.render(
+            {"index": index, "status": status, **body}, compact=True) + "\n"
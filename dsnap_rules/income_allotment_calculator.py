@@ -1,33 +1,85 @@
+import json
+
+import numpy as np
+
+# Household sizes up to which limits and allotments are precomputed
+MAX_HOUSEHOLD_SIZE = 20
+
+
+class CalculatorNotFound(Exception):
+    pass
+
+
+# Calculators keyed by (uses DSED, state abbreviation, region category); the
+# (uses DSED, None, None) entries are the defaults for states without a
+# calculator of their own
+CALCULATORS = {}
+
+# (uses DSED, state abbreviation) pairs whose calculators are registered by
+# region category, so that a region category is required
+REGIONAL_STATES = set()
+
+
+def register_calculator(calculator, state=None, region_category=None,
+                        uses_DSED=False):
+    """
+    Register the Income and Allotment Calculator for a state or territory, and
+    optionally for a region category within it.
+    """
+    CALCULATORS[(uses_DSED, state, region_category)] = calculator
+    if region_category is not None:
+        REGIONAL_STATES.add((uses_DSED, state))
+
+
+def load_calculators(path):
+    """
+    Register the calculators described in a JSON file: a list of objects with
+    `limits_and_allotments` (pairs ordered by household size),
+    `incremental_limit` and `incremental_allotment`, and optionally `state`,
+    `region_category` and `uses_DSED`.
+    """
+    with open(path) as f:
+        definitions = json.load(f)
+    for definition in definitions:
+        calculator = IncomeAndAllotmentCalculator(
+            definition["limits_and_allotments"],
+            definition["incremental_limit"],
+            definition["incremental_allotment"])
+        register_calculator(
+            calculator,
+            state=definition.get("state"),
+            region_category=definition.get("region_category"),
+            uses_DSED=definition.get("uses_DSED", False))
+
+
 def get_calculator(disaster, region_category=None):
     """
     Get the appropriate Income and Allotment Calculator for the state
     or territory.
     """
-    if disaster.uses_DSED:
-        return DSED_Calculator
-
-    if disaster.state == "AK":
-        if region_category == "URBAN":
-            return AK_URBAN_Calculator
-        elif region_category == "RURAL1":
-            return AK_RURAL1_Calculator
-        elif region_category == "RURAL2":
-            return AK_RURAL2_Calculator
-        else:
-            raise Exception("Calculator not found")
-    elif disaster.state == "HI":
-        return HI_Calculator
-    elif disaster.state == "GU":
-        return GU_Calculator
-    elif disaster.state == "VI":
-        return VI_Calculator
-    else:
-        return DEFAULT_Calculator
+    uses_DSED = bool(disaster.uses_DSED)
+    calculator = CALCULATORS.get(
+        (uses_DSED, disaster.state_id, region_category))
+    if calculator is None:
+        if (uses_DSED, disaster.state_id) in REGIONAL_STATES:
+            raise CalculatorNotFound(
+                f"No calculator for region category {region_category} in "
+                f"{disaster.state_id}")
+        calculator = CALCULATORS[(uses_DSED, None, None)]
+    return calculator
 
 
 class IncomeAndAllotmentCalculator:
+    """
+    Looks up the Disaster Gross Income Limit and the allotment for a
+    household size. Limits and allotments for households up to
+    `max_household_size` are precomputed into dense tables, indexed by
+    household size; larger households are extrapolated from the last entry
+    using the incremental limit and allotment.
+    """
     def __init__(self, limits_and_allotments, incremental_limit,
-                 incremental_allotment):
+                 incremental_allotment,
+                 max_household_size=MAX_HOUSEHOLD_SIZE):
         self.limits, self.allotments = zip(*limits_and_allotments)
 
         if any(x > y for x, y in zip(self.limits, self.limits[1:])):
@@ -37,8 +89,20 @@ class IncomeAndAllotmentCalculator:
 
         self.incremental_limit = incremental_limit
         self.incremental_allotment = incremental_allotment
+        self.max_household_size = max(max_household_size, len(self.limits))
 
-    def get_limit(self, size_of_household):
+        # Index 0 is unused so that the tables can be indexed by household
+        # size directly
+        sizes = range(self.max_household_size + 1)
+        self._limit_table = [0] + [
+            self.extrapolate_limit(size) for size in sizes[1:]]
+        self._allotment_table = [0] + [
+            self.extrapolate_allotment(size) for size in sizes[1:]]
+        self._table = list(zip(self._limit_table, self._allotment_table))
+        self.limit_array = np.array(self._limit_table)
+        self.allotment_array = np.array(self._allotment_table)
+
+    def extrapolate_limit(self, size_of_household):
         if size_of_household <= len(self.limits):
             return self.limits[size_of_household - 1]
         else:
@@ -46,7 +110,7 @@ class IncomeAndAllotmentCalculator:
                 (size_of_household - len(self.limits))
                 * self.incremental_limit)
 
-    def get_allotment(self, size_of_household):
+    def extrapolate_allotment(self, size_of_household):
         if size_of_household <= len(self.allotments):
             return self.allotments[size_of_household - 1]
         else:
@@ -54,6 +118,37 @@ class IncomeAndAllotmentCalculator:
                 (size_of_household - len(self.allotments))
                 * self.incremental_allotment)
 
+    def get_limit(self, size_of_household):
+        if 0 < size_of_household <= self.max_household_size:
+            return self._limit_table[size_of_household]
+        return self.extrapolate_limit(size_of_household)
+
+    def get_allotment(self, size_of_household):
+        if 0 < size_of_household <= self.max_household_size:
+            return self._allotment_table[size_of_household]
+        return self.extrapolate_allotment(size_of_household)
+
+    def get_limit_and_allotment(self, size_of_household):
+        if 0 < size_of_household <= self.max_household_size:
+            return self._table[size_of_household]
+        return (self.extrapolate_limit(size_of_household),
+                self.extrapolate_allotment(size_of_household))
+
+    def get_limits_and_allotments(self, sizes_of_household):
+        """
+        Array version of `get_limit_and_allotment`: returns an array of limits
+        and an array of allotments for an array of household sizes.
+        """
+        sizes = np.asarray(sizes_of_household, dtype=np.int64)
+        indexes = np.minimum(sizes, self.max_household_size)
+        extra_members = sizes - indexes
+        return (
+            self.limit_array[indexes]
+            + extra_members * self.incremental_limit,
+            self.allotment_array[indexes]
+            + extra_members * self.incremental_allotment
+        )
+
 
 DEFAULT_Calculator = IncomeAndAllotmentCalculator([
         (1728, 192),
@@ -151,3 +246,13 @@ DSED_Calculator = IncomeAndAllotmentCalculator([
         (6319, 1155),
     ],
     419, 144)
+
+
+register_calculator(DEFAULT_Calculator)
+register_calculator(DSED_Calculator, uses_DSED=True)
+register_calculator(AK_URBAN_Calculator, state="AK", region_category="URBAN")
+register_calculator(AK_RURAL1_Calculator, state="AK", region_category="RURAL1")
+register_calculator(AK_RURAL2_Calculator, state="AK", region_category="RURAL2")
+register_calculator(HI_Calculator, state="HI")
+register_calculator(GU_Calculator, state="GU")
+register_calculator(VI_Calculator, state="VI")
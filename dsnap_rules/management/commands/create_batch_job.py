@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dsnap_rules.batch_jobs import DEFAULT_CHUNK_SIZE, create_job
+from dsnap_rules.rules import ALL_FINDINGS, EVALUATION_MODES
+
+
+class Command(BaseCommand):
+    help = ("Create a resumable batch job for an NDJSON file of applications "
+            "and print its id; run it with run_batch_job")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "input", help="NDJSON file of applications, which must stay in "
+            "place and unchanged until the job is complete")
+        parser.add_argument(
+            "--mode", default=ALL_FINDINGS, choices=EVALUATION_MODES)
+        parser.add_argument(
+            "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+            help="Applications evaluated and checkpointed at a time")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        try:
+            job = create_job(
+                options["input"], options["chunk_size"], options["mode"])
+        except OSError as e:
+            raise CommandError(e)
+        self.stdout.write(f"{job.id}")
@@ -0,0 +1,147 @@
+"""
+Evaluate an NDJSON file of application payloads offline, e.g., to re-run a
+disaster's caseload overnight:
+
+    python manage.py evaluate_batch applications.jsonl -o results.jsonl
+
+Each output line is the determination of the input line with the same
+`index`, exactly as the bulk endpoint would return it. Lines are read and
+written as a stream, so memory use does not depend on the size of the file.
+"""
+import collections
+import itertools
+import multiprocessing
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from dsnap_rules import connection_pool
+from dsnap_rules.eligibility import iter_ndjson, render_determinations
+from dsnap_rules.models import Disaster
+from dsnap_rules.rules import ALL_FINDINGS, EVALUATION_MODES
+from dsnap_rules.snapshot import snapshots
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# The disasters of a worker process, keyed by id
+worker_disasters = {}
+
+
+def load_disasters():
+    return snapshots.current().disasters
+
+
+def init_worker(disasters):
+    worker_disasters.clear()
+    worker_disasters.update(disasters)
+
+
+def get_disaster(disaster_id):
+    try:
+        return worker_disasters[disaster_id]
+    except (KeyError, TypeError):
+        raise Disaster.DoesNotExist
+
+
+def evaluate_chunk(chunk):
+    """Return the NDJSON results of a `(start, lines, mode)` chunk."""
+    start, lines, mode = chunk
+    return "".join(render_determinations(
+        iter_ndjson(lines), mode, get_disaster, start))
+
+
+def chunk_lines(lines, size, mode):
+    """
+    Group the non-blank lines into chunks of `size`, numbered the way the bulk
+    endpoint numbers them.
+    """
+    lines = (line for line in lines if line.strip())
+    start = 0
+    while True:
+        chunk = list(itertools.islice(lines, size))
+        if not chunk:
+            return
+        yield start, chunk, mode
+        start += len(chunk)
+
+
+class Command(BaseCommand):
+    help = ("Determine eligibility for each application in an NDJSON file "
+            "and write the results as NDJSON")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "input", help="NDJSON file of applications, or - for stdin")
+        parser.add_argument(
+            "-o", "--output", default="-",
+            help="File to write the results to (default: stdout)")
+        parser.add_argument(
+            "--mode", default=ALL_FINDINGS, choices=EVALUATION_MODES)
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(),
+            help="Worker processes; 0 evaluates in this process")
+        parser.add_argument(
+            "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+            help="Applications sent to a worker at a time")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+
+        source = self.open(options["input"], "r", sys.stdin)
+        output = self.open(options["output"], "w", self.stdout)
+        disasters = load_disasters()
+
+        count = 0
+        try:
+            chunks = chunk_lines(
+                source, options["chunk_size"], options["mode"])
+            for results in self.evaluate(
+                    chunks, disasters, options["workers"]):
+                output.write(results)
+                count += results.count("\n")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if output is not self.stdout:
+                output.close()
+        self.stderr.write(f"Evaluated {count} applications")
+
+    def open(self, path, mode, default):
+        if path == "-":
+            return default
+        try:
+            return open(path, mode)
+        except OSError as e:
+            raise CommandError(e)
+
+    def evaluate(self, chunks, disasters, workers):
+        """
+        Yield the results of each chunk in order. With worker processes, at
+        most two chunks per worker are in flight, so that the input is not
+        read far ahead of the output.
+        """
+        if workers < 1:
+            init_worker(disasters)
+            for chunk in chunks:
+                yield evaluate_chunk(chunk)
+            return
+
+        # Workers are forked, whatever the platform's default start method,
+        # since a spawned process would import this module before Django is
+        # set up. They must not share the parent's database connections,
+        # including the idle connections of its pools.
+        connections.close_all()
+        connection_pool.close_all()
+        with multiprocessing.get_context("fork").Pool(
+                workers, initializer=init_worker,
+                initargs=(disasters,)) as pool:
+            pending = collections.deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(evaluate_chunk, (chunk,)))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
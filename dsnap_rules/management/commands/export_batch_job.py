@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dsnap_rules.batch_jobs import write_results
+from dsnap_rules.models import BatchJob
+
+
+class Command(BaseCommand):
+    help = "Write the NDJSON results of a complete batch job"
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_id", type=int)
+        parser.add_argument(
+            "-o", "--output", default="-",
+            help="File to write the results to (default: stdout)")
+
+    def handle(self, *args, **options):
+        try:
+            job = BatchJob.objects.get(pk=options["job_id"])
+        except BatchJob.DoesNotExist:
+            raise CommandError(f"Batch job {options['job_id']} not found")
+        if job.status != BatchJob.COMPLETE:
+            raise CommandError(f"Batch job {job.id} is {job.status}")
+
+        if options["output"] == "-":
+            write_results(job, self.stdout)
+            return
+        try:
+            with open(options["output"], "w") as output:
+                write_results(job, output)
+        except OSError as e:
+            raise CommandError(e)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dsnap_rules.batch_jobs import DEFAULT_STALE_AFTER, work
+from dsnap_rules.models import BatchJob
+
+
+class Command(BaseCommand):
+    help = ("Evaluate chunks of a batch job until none are left. Run several "
+            "at once to drain a job concurrently, or again to resume it")
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_id", type=int)
+        parser.add_argument(
+            "--stale-after", type=int, default=DEFAULT_STALE_AFTER,
+            help="Seconds after which chunks claimed by another worker are "
+            "claimed again")
+        parser.add_argument(
+            "--worker", help="Name recorded on claimed chunks "
+            "(default: host:pid)")
+
+    def handle(self, *args, **options):
+        try:
+            job = BatchJob.objects.get(pk=options["job_id"])
+        except BatchJob.DoesNotExist:
+            raise CommandError(f"Batch job {options['job_id']} not found")
+
+        completed = work(job, options["worker"], options["stale_after"])
+        job.refresh_from_db()
+        self.stderr.write(
+            f"Completed {completed} chunks; job {job.id} is {job.status}")
@@ -0,0 +1,327 @@
+"""
+Timings and counters of eligibility determinations, exposed in the Prometheus
+text format on /metrics.
+
+Metrics are off unless METRICS_ENABLED is set. When they are on,
+`DsnapRulesConfig.ready` adds a step hook (see `rules.STEP_HOOKS`) which
+times every rule and counts its successes and failures, and `stage_clock`
+times the stages of each determination. When they are off, no hook is added,
+so compiled plans run exactly as before, and `stage_clock` returns a clock
+that does nothing.
+
+The use of the database connection pools (see `connection_pool`) is copied
+in as counters and gauges whenever the metrics are written or read.
+
+Each process records its own metrics, and writes them to a file named after
+its pid in METRICS_DIR at most every METRICS_FLUSH_INTERVAL seconds. /metrics
+adds up the files of all running processes, so that the metrics of every
+gunicorn worker are reported, whichever worker serves the request. The files
+of processes which have exited are deleted rather than added in, so their
+gauges are dropped, and their counts with them, which Prometheus treats as a
+counter reset.
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from . import rules
+
+# Upper bounds, in seconds, of the histogram buckets
+BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+HISTOGRAMS = {
+    "dsnap_rule_duration_seconds": "Time taken to execute each rule",
+    "dsnap_stage_duration_seconds":
+        "Time taken by each stage of a determination",
+}
+COUNTERS = {
+    "dsnap_rule_results_total": "Outcomes of each rule",
+    "dsnap_result_cache_total": "Lookups and evictions of the result cache",
+    "dsnap_db_pool_created_total":
+        "Database connections opened by the connection pools",
+    "dsnap_db_pool_timeouts_total":
+        "Requests which timed out waiting for a pooled database connection",
+}
+GAUGES = {
+    "dsnap_db_pool_connections":
+        "Database connections of the connection pools, in use or idle",
+    "dsnap_db_pool_waiting": "Requests waiting for a pooled connection",
+}
+
+
+class Registry:
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flushed = time.monotonic()
+        # Functions called with the registry before it is written or read,
+        # to copy in metrics that are kept elsewhere
+        self.collectors = []
+        self.reset()
+
+    def reset(self):
+        # Counters map (name, labels) to a value, and histograms map them to
+        # the count of each bucket (the last is +Inf) followed by the sum
+        self.counters = defaultdict(float)
+        self.gauges = defaultdict(float)
+        self.histograms = defaultdict(lambda: [0] * (len(BUCKETS) + 2))
+
+    def inc(self, name, labels, amount=1):
+        with self._lock:
+            self.counters[(name, labels)] += amount
+        self.maybe_flush()
+
+    def observe(self, name, labels, seconds):
+        with self._lock:
+            histogram = self.histograms[(name, labels)]
+            histogram[bisect.bisect_left(BUCKETS, seconds)] += 1
+            histogram[-1] += seconds
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if (self.directory is not None
+                and time.monotonic() - self._flushed >= self.flush_interval):
+            self.flush()
+
+    def snapshot(self):
+        for collector in self.collectors:
+            collector(self)
+        with self._lock:
+            return {
+                "counters": [
+                    [name, list(labels), value]
+                    for ((name, labels), value) in self.counters.items()],
+                "gauges": [
+                    [name, list(labels), value]
+                    for ((name, labels), value) in self.gauges.items()],
+                "histograms": [
+                    [name, list(labels), list(histogram)]
+                    for ((name, labels), histogram)
+                    in self.histograms.items()],
+            }
+
+    def flush(self):
+        """Write this process's metrics to its file in the directory."""
+        self._flushed = time.monotonic()
+        path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + ".tmp", path)
+
+    def collect(self):
+        """
+        Return the metrics of every process writing to the directory, or of
+        this process if there is no directory, as a registry.
+        """
+        if self.directory is None:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            snapshots = []
+            for path in glob.glob(
+                    os.path.join(self.directory, "metrics-*.json")):
+                if not process_exists(path_pid(path)):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+
+        total = Registry()
+        for snapshot in snapshots:
+            for (name, labels, value) in snapshot["counters"]:
+                total.counters[(name, labels_key(labels))] += value
+            for (name, labels, value) in snapshot.get("gauges", []):
+                total.gauges[(name, labels_key(labels))] += value
+            for (name, labels, histogram) in snapshot["histograms"]:
+                counts = total.histograms[(name, labels_key(labels))]
+                for i, value in enumerate(histogram):
+                    counts[i] += value
+        return total
+
+    def exposition(self):
+        """Return the metrics in the Prometheus text format."""
+        lines = []
+        by_name = defaultdict(list)
+        for ((name, labels), histogram) in sorted(self.histograms.items()):
+            by_name[name].append((labels, histogram))
+        for name, series in by_name.items():
+            lines.append(f"# HELP {name} {HISTOGRAMS.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in series:
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), histogram):
+                    cumulative += count
+                    lines.append(
+                        f"{name}_bucket"
+                        f"{format_labels(labels + (('le', bound),))} "
+                        f"{cumulative}")
+                lines.append(
+                    f"{name}_sum{format_labels(labels)} {histogram[-1]!r}")
+                lines.append(f"{name}_count{format_labels(labels)} "
+                             f"{cumulative}")
+
+        for (kind, values, helps) in (("counter", self.counters, COUNTERS),
+                                      ("gauge", self.gauges, GAUGES)):
+            by_name = defaultdict(list)
+            for ((name, labels), value) in sorted(values.items()):
+                by_name[name].append((labels, value))
+            for name, series in by_name.items():
+                lines.append(f"# HELP {name} {helps.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in series:
+                    lines.append(f"{name}{format_labels(labels)} {value!r}")
+        return "\n".join(lines) + "\n"
+
+
+def path_pid(path):
+    """Return the pid in the name of a metrics file, or None."""
+    name = os.path.basename(path)[len("metrics-"):-len(".json")]
+    return int(name) if name.isdigit() else None
+
+
+def process_exists(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, as another user
+        return True
+    return True
+
+
+def labels_key(labels):
+    """Return labels read from JSON as the tuple of pairs used as keys."""
+    return tuple(tuple(pair) for pair in labels)
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        f'{key}="{value}"' for (key, value) in labels) + "}"
+
+
+# The registry of this process, or None when metrics are disabled
+registry = None
+
+
+def rule_hook(rule, step):
+    """Step hook recording the duration and outcome of the rule."""
+    duration_labels = (("rule", rule.__class__.__name__),)
+    success_labels = duration_labels + (("outcome", "success"),)
+    failure_labels = duration_labels + (("outcome", "failure"),)
+
+    def timed_step(application, disaster, findings, metrics):
+        started = time.perf_counter()
+        successful = step(application, disaster, findings, metrics)
+        elapsed = time.perf_counter() - started
+        registry.observe(
+            "dsnap_rule_duration_seconds", duration_labels, elapsed)
+        registry.inc(
+            "dsnap_rule_results_total",
+            success_labels if successful else failure_labels)
+        return successful
+    return timed_step
+
+
+class StageClock:
+    """Records the time since the previous lap as the duration of a stage."""
+    __slots__ = ('_last',)
+
+    def __init__(self):
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        registry.observe(
+            "dsnap_stage_duration_seconds", (("stage", stage),),
+            now - self._last)
+        self._last = now
+
+
+class NullClock:
+    __slots__ = ()
+
+    def lap(self, stage):
+        pass
+
+
+NULL_CLOCK = NullClock()
+
+
+def stage_clock():
+    """Return a clock for timing the stages of a determination."""
+    if registry is None:
+        return NULL_CLOCK
+    return StageClock()
+
+
+def collect_result_cache(registry):
+    """Copy the counters of the result cache into the registry."""
+    from .result_cache import results
+
+    stats = results.stats()
+    with registry._lock:
+        for event in ("hits", "misses", "evictions"):
+            registry.counters[
+                ("dsnap_result_cache_total", (("event", event),))] = \
+                stats[event]
+
+
+def collect_connection_pools(registry):
+    """Copy the state of the database connection pools into the registry."""
+    from .connection_pool import pools
+
+    counters = defaultdict(float)
+    gauges = defaultdict(float)
+    for (key, pool) in list(pools.items()):
+        database = (("database", key[0]),)
+        stats = pool.stats()
+        counters[("dsnap_db_pool_created_total", database)] += \
+            stats["created"]
+        counters[("dsnap_db_pool_timeouts_total", database)] += \
+            stats["timeouts"]
+        for state in ("in_use", "idle"):
+            labels = database + (("state", state),)
+            gauges[("dsnap_db_pool_connections", labels)] += stats[state]
+        gauges[("dsnap_db_pool_waiting", database)] += stats["waiting"]
+    with registry._lock:
+        registry.counters.update(counters)
+        registry.gauges.update(gauges)
+
+
+def configure():
+    """
+    Enable metrics when the settings ask for them, and add the rule hook.
+    Called when the app is ready, before the eligibility plan is compiled.
+    """
+    global registry
+    if not getattr(settings, "METRICS_ENABLED", False):
+        return
+    directory = getattr(settings, "METRICS_DIR", None)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    registry = Registry(
+        directory or None, getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0))
+    registry.collectors.append(collect_result_cache)
+    registry.collectors.append(collect_connection_pools)
+    rules.add_step_hook(rule_hook)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dsnap_rules', '0007_batch_jobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='applicationperiod',
+            index=models.Index(fields=['registration_end_date', 'registration_begin_date', 'disaster'], name='app_period_active_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class State(models.Model):
@@ -45,6 +46,15 @@ class County(models.Model):
 class ApplicationPeriod(models.Model):
     class Meta:
         db_table = "application_period"
+        indexes = [
+            # For the active disasters: registration_end_date leads because
+            # it is the selective bound once periods have piled up, and the
+            # disaster makes the index covering
+            models.Index(
+                fields=['registration_end_date', 'registration_begin_date',
+                        'disaster'],
+                name='app_period_active_idx'),
+        ]
     disaster = models.ForeignKey(Disaster, on_delete=models.CASCADE,
                                  related_name='application_periods')
     begin_date = models.DateField(null=False)
@@ -55,3 +65,75 @@ class ApplicationPeriod(models.Model):
 
     def __str__(self):
         return ''
+
+
+class ReferenceDataVersion(models.Model):
+    """
+    A single row which records when the disaster reference data last changed,
+    used to validate cached copies of it
+    """
+    class Meta:
+        db_table = "reference_data_version"
+    version = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.version}'
+
+
+class BatchJob(models.Model):
+    """
+    A re-determination of the applications in an NDJSON file, split into
+    chunks which worker processes evaluate independently
+    """
+    class Meta:
+        db_table = "batch_job"
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETE = "complete"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (COMPLETE, "Complete"),
+    )
+    input_path = models.CharField(max_length=255)
+    mode = models.CharField(max_length=30)
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.id}: {self.input_path}'
+
+
+class BatchChunk(models.Model):
+    """
+    The lines of a batch job's input between two byte offsets, with the
+    NDJSON results once they have been evaluated
+    """
+    class Meta:
+        db_table = "batch_chunk"
+        unique_together = ('job', 'number')
+    PENDING = "pending"
+    CLAIMED = "claimed"
+    DONE = "done"
+    STATUSES = (
+        (PENDING, "Pending"),
+        (CLAIMED, "Claimed"),
+        (DONE, "Done"),
+    )
+    job = models.ForeignKey(BatchJob, on_delete=models.CASCADE,
+                            related_name='chunks')
+    number = models.PositiveIntegerField()
+    start_offset = models.BigIntegerField()
+    end_offset = models.BigIntegerField()
+    first_index = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=PENDING)
+    claimed_by = models.CharField(max_length=100, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    results = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'{self.job_id}.{self.number}'
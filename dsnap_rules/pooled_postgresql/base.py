@@ -0,0 +1,67 @@
+"""
+PostgreSQL backend taking its connections from a `connection_pool` pool.
+
+Configured with `'ENGINE': 'dsnap_rules.pooled_postgresql'` and the pool's
+options in the database's POOL setting. CONN_MAX_AGE should be 0, so that
+connections go back to the pool at the end of each request.
+"""
+from django.db.backends.postgresql import base, creation
+
+from .. import connection_pool
+
+# psycopg2's TRANSACTION_STATUS_IDLE, the status of a connection outside of
+# a transaction
+TRANSACTION_IDLE = 0
+
+
+def check(connection):
+    if connection.closed:
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    return True
+
+
+def reset(connection):
+    if connection.closed:
+        raise base.Database.InterfaceError("connection already closed")
+    if connection.get_transaction_status() != TRANSACTION_IDLE:
+        connection.rollback()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    # Test databases cannot be dropped or copied while pooled connections to
+    # them are open
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        connection_pool.close_all()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        connection_pool.close_all()
+        super()._clone_test_db(suffix, verbosity, keepdb)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    @property
+    def pool(self):
+        settings_dict = self.settings_dict
+        key = (self.alias, settings_dict["HOST"], settings_dict["PORT"],
+               settings_dict["NAME"], settings_dict["USER"])
+        return connection_pool.get_pool(
+            key, None, check=check, reset=reset,
+            **settings_dict.get("POOL", {}))
+
+    def get_new_connection(self, conn_params):
+        get_new_connection = super().get_new_connection
+        return self.pool.get(lambda: get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # A connection closed within an atomic block is still referenced by
+        # this wrapper, so it cannot be shared
+        with self.wrap_database_errors:
+            self.pool.put(self.connection, discard=self.in_atomic_block)
@@ -0,0 +1,113 @@
+"""
+Versioning and caching of the disaster reference data served to the
+registration front end.
+
+The reference data version is stored in the `ReferenceDataVersion` row and
+bumped whenever a disaster, application period, county or state is edited
+(see `signals.py`). Cache keys and ETags include it, so that stale copies are
+never served. The current version is itself cached for REFERENCE_DATA_TTL
+seconds, and cleared on edits. The default cache is per process, and edits
+only clear it in the process that made them, so nothing built from the
+reference data is cached for longer than that either.
+"""
+import datetime
+import json
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ReferenceDataVersion
+
+VERSION_KEY = "dsnap_rules:reference-data-version"
+
+# The validators of a response built from the reference data
+Stamp = namedtuple("Stamp", ["etag", "last_modified"])
+
+
+def current():
+    """Return the current `ReferenceDataVersion`"""
+    stamp = cache.get(VERSION_KEY)
+    if stamp is None:
+        stamp, _ = ReferenceDataVersion.objects.get_or_create(pk=1)
+        cache.set(VERSION_KEY, stamp, settings.REFERENCE_DATA_TTL)
+    return stamp
+
+
+def version():
+    return current().version
+
+
+def cached_version():
+    """Return the version if it is cached, or None, without any query"""
+    stamp = cache.get(VERSION_KEY)
+    return None if stamp is None else stamp.version
+
+
+def bump_version():
+    updated = ReferenceDataVersion.objects.filter(pk=1).update(
+        version=F("version") + 1, updated_at=timezone.now())
+    if not updated:
+        ReferenceDataVersion.objects.get_or_create(pk=1)
+    cache.delete(VERSION_KEY)
+    # Another request may cache the old version before the edit commits
+    transaction.on_commit(lambda: cache.delete(VERSION_KEY))
+
+
+def disasters_stamp():
+    """Return the validators of the demo form, which lists all disasters"""
+    reference = current()
+    return Stamp(f"{reference.version}", reference.updated_at)
+
+
+def active_disasters_stamp():
+    """
+    Return the validators of the active disasters, which also change at
+    midnight
+    """
+    reference = current()
+    today = timezone.localdate()
+    midnight = timezone.make_aware(
+        datetime.datetime.combine(today, datetime.time()))
+    return Stamp(f"{reference.version}-{today.isoformat()}",
+                 max(reference.updated_at, midnight))
+
+
+def active_disasters():
+    """
+    Return the serialized active disasters, i.e., disasters that have one or
+    more application periods which have registration periods that span the
+    current date, from the reference data snapshot.
+    """
+    # Imported here, since the registry and snapshot depend on this module's
+    # version
+    from .active_disasters import registry
+    from .snapshot import serialize
+
+    active = registry.current()
+    disasters = active.snapshot.disasters
+    return [
+        serialize(disasters[disaster_id])
+        for disaster_id in sorted(active.on(timezone.localdate()))
+    ]
+
+
+def active_disasters_body():
+    """
+    Return the JSON body of the active disasters, which is cached for the
+    current local date and reference data version, for REFERENCE_DATA_TTL
+    seconds.
+    """
+    key = "dsnap_rules:active-disasters:{}:{}".format(
+        timezone.localdate().isoformat(), version())
+    body = cache.get(key)
+    if body is None:
+        body = json.dumps(
+            active_disasters(), cls=DjangoJSONEncoder,
+            separators=(",", ":")).encode()
+        cache.set(key, body, settings.REFERENCE_DATA_TTL)
+    return body
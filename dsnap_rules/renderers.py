@@ -0,0 +1,84 @@
+"""
+Rendering of eligibility determinations to JSON.
+
+Most findings are static, so they are encoded once, for both the indented and
+the compact output, and spliced into each response. Only the dynamic parts of
+a determination, such as the income finding and the allotment, are encoded
+per request. The output is identical to `json.dumps` of the same body.
+"""
+import json
+import re
+
+from .dsnap_rules import ELIGIBILITY_RULES
+
+INDENT = 2
+COMPACT_SEPARATORS = (",", ":")
+
+COMPACT_ACCEPT_RE = re.compile(r";\s*indent\s*=\s*0\b")
+
+
+def wants_compact(request):
+    """
+    Compact output is requested with a `compact` query parameter, or with an
+    `indent=0` parameter on the JSON media type in the Accept header, as used
+    by Django REST framework.
+    """
+    if request.GET.get("compact", "").lower() in ("1", "true"):
+        return True
+    return bool(COMPACT_ACCEPT_RE.search(request.META.get("HTTP_ACCEPT", "")))
+
+
+def encode(value, compact, level=0):
+    if compact:
+        return json.dumps(value, separators=COMPACT_SEPARATORS)
+    return json.dumps(value, indent=INDENT).replace(
+        "\n", "\n" + " " * INDENT * level)
+
+
+class DeterminationRenderer:
+    def __init__(self, rule):
+        self.fragments = {}
+        for finding in rule.static_findings():
+            key = (finding["rule"], finding["succeeded"], finding["text"])
+            self.fragments[key] = (
+                encode(finding, compact=False, level=2),
+                encode(finding, compact=True))
+
+    def render_finding(self, finding, compact):
+        succeeded = finding["succeeded"]
+        if type(succeeded) is bool:
+            fragments = self.fragments.get(
+                (finding["rule"], succeeded, finding["text"]))
+            if fragments is not None:
+                return fragments[compact]
+        return encode(finding, compact, level=2)
+
+    def render_findings(self, findings, compact):
+        rendered = [self.render_finding(f, compact) for f in findings]
+        if compact:
+            return "[" + ",".join(rendered) + "]"
+        if not rendered:
+            return "[]"
+        padding = " " * INDENT * 2
+        return ("[\n" + padding + (",\n" + padding).join(rendered)
+                + "\n" + " " * INDENT + "]")
+
+    def render(self, body, compact=False):
+        """Render a determination or error body to a JSON string."""
+        members = []
+        for key, value in body.items():
+            if key == "findings":
+                value = self.render_findings(value, compact)
+            else:
+                value = encode(value, compact, level=1)
+            members.append(
+                json.dumps(key) + (":" if compact else ": ") + value)
+        if compact:
+            return "{" + ",".join(members) + "}"
+        if not members:
+            return "{}"
+        padding = " " * INDENT
+        return ("{\n" + padding + (",\n" + padding).join(members) + "\n}")
+
+
+renderer = DeterminationRenderer(ELIGIBILITY_RULES)
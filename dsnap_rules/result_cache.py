@@ -0,0 +1,109 @@
+"""
+Process-local LRU cache of rendered eligibility determinations.
+
+Kiosk retries and re-submissions send identical payloads, so successful
+determinations are cached under a canonical hash of the payload, the
+evaluation mode and rendering, and the version of the disaster in
+`disaster_cache`. A hit skips validation and the rules. The least recently
+used entries are evicted once the rendered bodies exceed
+`RESULT_CACHE_MAX_BYTES`, and the signals in `signals.py` drop the entries of
+a disaster whenever it is saved or deleted.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .disaster_cache import disasters
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+class ResultCache:
+    def __init__(self, max_bytes=None, disasters=disasters):
+        self._max_bytes = max_bytes
+        self._disasters = disasters
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is None:
+            return getattr(
+                settings, "RESULT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+        return self._max_bytes
+
+    def key(self, payload, mode, compact):
+        """
+        Return the cache key for a determination, or None if it cannot be
+        cached, i.e., the payload has no integer disaster id or the disaster
+        is not loaded.
+        """
+        if not isinstance(payload, dict):
+            return None
+        disaster_id = payload.get("disaster_id")
+        if type(disaster_id) is not int:
+            return None
+        version = self._disasters.version(disaster_id)
+        if version is None:
+            return None
+        canonical = json.dumps(
+            payload, sort_keys=True, separators=(",", ":")).encode()
+        digest = hashlib.blake2b(canonical, digest_size=16).digest()
+        return (disaster_id, version, mode, compact, digest)
+
+    def get(self, key):
+        """Return the cached content for the key, or None."""
+        with self._lock:
+            content = self._entries.get(key)
+            if content is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return content
+
+    def set(self, key, content):
+        max_bytes = self.max_bytes
+        if key is None or len(content) > max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = content
+            self.size += len(content)
+            while self.size > max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, disaster_id=None):
+        """
+        Drop the entries for a disaster, or every entry if no id is given.
+        """
+        with self._lock:
+            if disaster_id is None:
+                self._entries.clear()
+                self.size = 0
+                return
+            for key in [key for key in self._entries if key[0] == disaster_id]:
+                self.size -= len(self._entries.pop(key))
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+results = ResultCache()
@@ -0,0 +1,65 @@
+"""
+Routing of reference data reads to read replicas.
+
+Reads go to the default database unless they are made inside `replica_reads`,
+which the reference data snapshot and the demo form use. Those reads go to a
+random database of REPLICA_DATABASES, except within REPLICA_LAG seconds of
+the last change to the reference data, when a replica may not have the change
+yet; the snapshot reloaded because of the change then reads it from the
+default database. The time of the last change is
+`ReferenceDataVersion.updated_at`, which is always read from the default
+database.
+"""
+import contextlib
+import contextvars
+import datetime
+import random
+
+from django.conf import settings
+from django.utils import timezone
+
+reading_replicas = contextvars.ContextVar(
+    "dsnap_reading_replicas", default=False)
+
+
+@contextlib.contextmanager
+def replica_reads():
+    """Send the reads of the block, or of the decorated function, to a
+    replica when possible.
+    """
+    token = reading_replicas.set(True)
+    try:
+        yield
+    finally:
+        reading_replicas.reset(token)
+
+
+def recently_changed():
+    from .reference_data import current
+
+    lag = datetime.timedelta(seconds=getattr(settings, "REPLICA_LAG", 0))
+    return timezone.now() - current().updated_at < lag
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not reading_replicas.get():
+            return None
+        replicas = getattr(settings, "REPLICA_DATABASES", [])
+        if (not replicas
+                or model._meta.label == "dsnap_rules.ReferenceDataVersion"
+                or recently_changed()):
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the default database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, "REPLICA_DATABASES", []):
+            return False
+        return None
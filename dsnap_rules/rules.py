@@ -1,3 +1,27 @@
+# Evaluation modes for `And` rules and compiled plans. ALL_FINDINGS executes
+# every rule; FIRST_FAILURE stops at the first failing rule and reports the
+# findings up to and including it; SUCCESS_OR_FIRST_FAILURE also stops at the
+# first failing rule but reports only that rule's findings.
+ALL_FINDINGS = "all_findings"
+FIRST_FAILURE = "first_failure"
+SUCCESS_OR_FIRST_FAILURE = "success_or_first_failure"
+EVALUATION_MODES = (ALL_FINDINGS, FIRST_FAILURE, SUCCESS_OR_FIRST_FAILURE)
+
+# Hooks applied to the step of every rule when a rule tree is compiled, e.g.,
+# to record metrics. A hook is called with the rule and its step, and returns
+# the step to use instead. Plans compiled while there are no hooks run the
+# rules' steps directly.
+STEP_HOOKS = []
+
+
+def add_step_hook(hook):
+    STEP_HOOKS.append(hook)
+
+
+def remove_step_hook(hook):
+    STEP_HOOKS.remove(hook)
+
+
 class Result:
     """ A Result object encapsulates a `bool` indicator of success, a list of
     findings, and any metrics that were computed by the executed results.
@@ -18,6 +42,47 @@ class Result:
             and self.metrics == other.metrics)
 
 
+class ColumnResult:
+    """A ColumnResult is the columnar counterpart of a `Result`, produced when
+    a rule is executed for a whole batch of applications at once. `successful`
+    is an array of `bool`, and each finding is a `(rule, succeeded, codes,
+    details)` tuple where `codes` indexes the rule's `finding_texts` and
+    `details` holds any per-row values needed to render the finding text.
+    Metrics map a name to a `(values, mask)` pair of arrays; a row only has the
+    metric when its mask is set. `errors` maps the index of any row that the
+    scalar rules would have raised an exception for to that exception.
+    """
+    def __init__(self, successful, findings, metrics=None, errors=None):
+        if metrics is None:
+            metrics = {}
+        if errors is None:
+            errors = {}
+        self.successful = successful
+        self.findings = findings
+        self.metrics = metrics
+        self.errors = errors
+
+    def row(self, index):
+        """Return the `Result` for a single row of the batch, or raise the
+        row's error.
+        """
+        error = self.errors.get(index)
+        if error is not None:
+            raise error
+        findings = [
+            rule.assemble_findings(
+                bool(succeeded[index]),
+                rule.finding_text(int(codes[index]), details, index))[0]
+            for (rule, succeeded, codes, details) in self.findings
+        ]
+        metrics = {
+            name: values[index].item()
+            for name, (values, mask) in self.metrics.items()
+            if mask[index]
+        }
+        return Result(bool(self.successful[index]), findings, metrics)
+
+
 class Rule:
     """A Rule is a piece of logic that can be executed with an application and
     a disaster to provide a result. An application is an object that contains
@@ -28,6 +93,47 @@ class Rule:
     def execute(self, application, disaster):
         pass
 
+    def compile(self):
+        """Compile this rule into a `Plan` that can be executed for any number
+        of applications without rebuilding or walking the rule tree.
+        """
+        return Plan(self)
+
+    def steps(self):
+        """Return the flat sequence of plan steps for this rule. A step is a
+        callable taking an application, a disaster, and the findings list and
+        metrics dict to add to; it returns the rule's indicator of success.
+        """
+        execute = self.execute
+
+        def step(application, disaster, findings, metrics):
+            result = execute(application, disaster)
+            findings.extend(result.findings)
+            metrics.update(result.metrics)
+            return result.successful
+        return (self.hook(step),)
+
+    def hook(self, step):
+        """Return the step wrapped by the `STEP_HOOKS`."""
+        for hook in STEP_HOOKS:
+            step = hook(self, step)
+        return step
+
+    def execute_columns(self, columns, disaster):
+        """Execute this rule for a batch of applications held as columns of
+        arrays (see `batch.ApplicationColumns`) and return a `ColumnResult`.
+        """
+        pass
+
+    def finding_text(self, code, details, index):
+        return self.finding_texts[code]
+
+    def static_findings(self):
+        """Return the findings this rule can produce whose text never varies,
+        so that they can be prepared ahead of time (see `renderers`).
+        """
+        return []
+
     def assemble_findings(self, result, text):
         return [{
             "rule": self.__class__.__name__,
@@ -46,13 +152,49 @@ class SimplePredicateRule(Rule):
         finding = self.success_finding if result else self.failure_finding
         return Result(result, self.assemble_findings(result, finding))
 
+    def steps(self):
+        name = self.__class__.__name__
+        predicate = self.predicate
+        success_finding = self.success_finding
+        failure_finding = self.failure_finding
+
+        def step(application, disaster, findings, metrics):
+            result = predicate(application, disaster)
+            findings.append({
+                "rule": name,
+                "succeeded": result,
+                "text": success_finding if result else failure_finding
+            })
+            return result
+        return (self.hook(step),)
+
+    def execute_columns(self, columns, disaster):
+        successful = self.predicate_columns(columns, disaster)
+        codes = (~successful).astype('int8')
+        return ColumnResult(successful, [(self, successful, codes, None)])
+
+    @property
+    def finding_texts(self):
+        return (self.success_finding, self.failure_finding)
+
+    def static_findings(self):
+        return (self.assemble_findings(True, self.success_finding)
+                + self.assemble_findings(False, self.failure_finding))
+
     def predicate(self, application, disaster):
         pass
 
+    def predicate_columns(self, columns, disaster):
+        """Array version of `predicate`, returning an array of `bool`."""
+        pass
+
 
 class And(Rule):
-    def __init__(self, *rules):
+    def __init__(self, *rules, mode=ALL_FINDINGS):
+        if mode not in EVALUATION_MODES:
+            raise ValueError(f"Unknown evaluation mode {mode}")
         self.rules = rules
+        self.mode = mode
 
     def execute(self, application, disaster):
         overall_success = True
@@ -60,7 +202,99 @@ class And(Rule):
         overall_metrics = {}
         for rule in self.rules:
             result = rule.execute(application, disaster)
+            if not result.successful and self.mode != ALL_FINDINGS:
+                if self.mode == SUCCESS_OR_FIRST_FAILURE:
+                    return result
+                overall_findings.extend(result.findings)
+                overall_metrics.update(result.metrics)
+                return Result(
+                    result.successful, overall_findings, overall_metrics)
             overall_success = overall_success and result.successful
             overall_findings.extend(result.findings)
             overall_metrics.update(result.metrics)
         return Result(overall_success, overall_findings, overall_metrics)
+
+    def execute_columns(self, columns, disaster):
+        # Rows stop at different rules when evaluation stops at the first
+        # failure, so only ALL_FINDINGS is evaluated on columns
+        if self.mode != ALL_FINDINGS:
+            raise ValueError(
+                f"Evaluation mode {self.mode} not supported on columns")
+        overall_success = None
+        overall_findings = []
+        overall_metrics = {}
+        overall_errors = {}
+        for rule in self.rules:
+            result = rule.execute_columns(columns, disaster)
+            overall_success = (result.successful if overall_success is None
+                               else overall_success & result.successful)
+            overall_findings.extend(result.findings)
+            overall_metrics.update(result.metrics)
+            for (index, error) in result.errors.items():
+                overall_errors.setdefault(index, error)
+        return ColumnResult(overall_success, overall_findings, overall_metrics,
+                            overall_errors)
+
+    def steps(self):
+        return tuple(step for rule in self.rules for step in rule.steps())
+
+    def static_findings(self):
+        return [finding for rule in self.rules
+                for finding in rule.static_findings()]
+
+
+class Plan:
+    """A Plan is the compiled, immutable form of a rule tree. The tree is
+    flattened into a tuple of steps once, so executing the plan only runs the
+    steps and builds a single `Result` with the same outcome as executing the
+    rule itself.
+
+    The plan's default evaluation mode is taken from the compiled rule, and
+    applies to all of the flattened steps.
+    """
+    __slots__ = ('_steps', 'mode')
+
+    def __init__(self, rule):
+        object.__setattr__(self, '_steps', tuple(rule.steps()))
+        object.__setattr__(self, 'mode', getattr(rule, 'mode', ALL_FINDINGS))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Plan is immutable")
+
+    def __len__(self):
+        return len(self._steps)
+
+    def execute(self, application, disaster, mode=None):
+        if mode is None:
+            mode = self.mode
+        if mode != ALL_FINDINGS:
+            return self._execute_until_failure(application, disaster, mode)
+
+        overall_success = True
+        findings = []
+        metrics = {}
+        for step in self._steps:
+            successful = step(application, disaster, findings, metrics)
+            overall_success = overall_success and successful
+        return Result(overall_success, findings, metrics)
+
+    def _execute_until_failure(self, application, disaster, mode):
+        if mode not in EVALUATION_MODES:
+            raise ValueError(f"Unknown evaluation mode {mode}")
+
+        overall_success = True
+        findings = []
+        metrics = {}
+        for step in self._steps:
+            first_finding = len(findings)
+            step_metrics = {}
+            successful = step(application, disaster, findings, step_metrics)
+            if not successful:
+                if mode == SUCCESS_OR_FIRST_FAILURE:
+                    return Result(
+                        successful, findings[first_finding:], step_metrics)
+                metrics.update(step_metrics)
+                return Result(successful, findings, metrics)
+            overall_success = overall_success and successful
+            metrics.update(step_metrics)
+        return Result(overall_success, findings, metrics)
@@ -0,0 +1,28 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import reference_data
+from .disaster_cache import disasters
+from .models import ApplicationPeriod, County, Disaster, State
+from .result_cache import results
+
+
+@receiver([post_save, post_delete], sender=Disaster)
+def invalidate_disaster(sender, instance, **kwargs):
+    disasters.invalidate(instance.pk)
+    results.invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=State)
+def invalidate_state(sender, instance, **kwargs):
+    disasters.invalidate()
+    results.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Disaster)
+@receiver([post_save, post_delete], sender=ApplicationPeriod)
+@receiver([post_save, post_delete], sender=County)
+@receiver([post_save, post_delete], sender=State)
+@receiver(m2m_changed, sender=ApplicationPeriod.counties.through)
+def bump_reference_data_version(sender, **kwargs):
+    reference_data.bump_version()
@@ -0,0 +1,146 @@
+"""
+Immutable, versioned snapshot of the disaster reference data.
+
+The eligibility rules and /disasters only need a few fields of the disasters,
+their states, application periods and counties. `Snapshot.load` reads all of
+them in four queries into named tuples, which cannot be changed once built,
+and tags them with the reference data version (see `reference_data`).
+`SnapshotRegistry.current` compares that version with the current one, which
+is cached, and loads a new snapshot when they differ. The new snapshot
+replaces the old one in a single assignment, so readers see one complete
+snapshot or the other, never a mix of the two.
+"""
+from collections import defaultdict, namedtuple
+
+from . import reference_data
+from .models import ApplicationPeriod, Disaster, State
+from .routers import replica_reads
+
+StateRecord = namedtuple("StateRecord", ["abbreviation", "name"])
+
+CountyRecord = namedtuple("CountyRecord", ["id", "name"])
+
+ApplicationPeriodRecord = namedtuple("ApplicationPeriodRecord", [
+    "id", "disaster_id", "begin_date", "end_date", "registration_begin_date",
+    "registration_end_date", "counties"])
+
+DisasterRecord = namedtuple("DisasterRecord", [
+    "id", "disaster_request_no", "title", "description",
+    "benefit_begin_date", "benefit_end_date", "state_id", "state",
+    "residency_required", "uses_DSED", "allows_food_loss_alone",
+    "application_periods"])
+
+DISASTER_FIELDS = (
+    'id', 'disaster_request_no', 'title', 'description', 'benefit_begin_date',
+    'benefit_end_date', 'state_id', 'residency_required', 'uses_DSED',
+    'allows_food_loss_alone')
+
+PERIOD_FIELDS = (
+    'id', 'disaster_id', 'begin_date', 'end_date', 'registration_begin_date',
+    'registration_end_date')
+
+
+class Snapshot:
+    """The disasters, by id, as of a reference data version."""
+    __slots__ = ('version', 'disasters')
+
+    def __init__(self, version, disasters):
+        self.version = version
+        self.disasters = disasters
+
+    @classmethod
+    @replica_reads()
+    def load(cls, version):
+        states = {
+            abbreviation: StateRecord(abbreviation, name)
+            for (abbreviation, name)
+            in State.objects.values_list('abbreviation', 'name')
+        }
+
+        counties = defaultdict(list)
+        for (period_id, county_id, name) in (
+                ApplicationPeriod.counties.through.objects.order_by('pk')
+                .values_list('applicationperiod_id', 'county_id',
+                             'county__name')):
+            counties[period_id].append(CountyRecord(county_id, name))
+
+        periods = defaultdict(list)
+        for values in ApplicationPeriod.objects.order_by('pk').values_list(
+                *PERIOD_FIELDS):
+            period = ApplicationPeriodRecord(
+                *values, tuple(counties.get(values[0], ())))
+            periods[period.disaster_id].append(period)
+
+        disasters = {}
+        for values in Disaster.objects.values_list(*DISASTER_FIELDS):
+            fields = dict(zip(DISASTER_FIELDS, values))
+            fields["state"] = states[fields["state_id"]]
+            fields["application_periods"] = tuple(
+                periods.get(fields["id"], ()))
+            disasters[fields["id"]] = DisasterRecord(**fields)
+        return cls(version, disasters)
+
+    def get(self, disaster_id):
+        """
+        Return the disaster for the id. Raises `Disaster.DoesNotExist` if
+        there is no such disaster.
+        """
+        try:
+            return self.disasters[disaster_id]
+        except (KeyError, TypeError):
+            raise Disaster.DoesNotExist(f"Disaster {disaster_id} not found")
+
+
+def serialize(disaster):
+    """
+    Return the disaster as `serializers.DisasterSerializer` represents it,
+    without its Python types converted.
+    """
+    return {
+        "id": disaster.id,
+        "application_periods": [
+            {
+                "begin_date": period.begin_date,
+                "end_date": period.end_date,
+                "registration_begin_date": period.registration_begin_date,
+                "registration_end_date": period.registration_end_date,
+                "counties": [county.name for county in period.counties],
+            }
+            for period in disaster.application_periods
+        ],
+        "disaster_request_no": disaster.disaster_request_no,
+        "title": disaster.title,
+        "description": disaster.description,
+        "benefit_begin_date": disaster.benefit_begin_date,
+        "benefit_end_date": disaster.benefit_end_date,
+        "residency_required": disaster.residency_required,
+        "uses_DSED": disaster.uses_DSED,
+        "allows_food_loss_alone": disaster.allows_food_loss_alone,
+        "state": disaster.state_id,
+    }
+
+
+class SnapshotRegistry:
+    def __init__(self):
+        self._snapshot = None
+
+    def current(self):
+        """Return the snapshot, reloaded if the reference data changed."""
+        version = reference_data.version()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            # Loaded after reading the version, so that a change made in
+            # between is loaded again on the next call
+            snapshot = Snapshot.load(version)
+            self._snapshot = snapshot
+        return snapshot
+
+    def loaded(self):
+        """Return the snapshot last loaded, if any, without checking it."""
+        return self._snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+
+snapshots = SnapshotRegistry()
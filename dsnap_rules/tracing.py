@@ -0,0 +1,274 @@
+"""
+Vendor-neutral tracing of eligibility determinations.
+
+A sampled determination is traced from the view down: its spans cover
+validation, the disaster lookup, each rule of the eligibility plan, the
+calculator lookup and rendering. Finished traces are handed to every
+exporter in TRACING_EXPORTERS, which are `(dotted path, options)` pairs; an
+exporter is any object with an `export(spans)` method taking a list of span
+dicts. `JSONLinesExporter` writes spans to a local file, one per line.
+
+Tracing is off unless TRACING_SAMPLE_RATE is above 0 and there is an
+exporter. TRACING_SAMPLE_RATE is the fraction of determinations traced, and
+TRACING_MAX_PER_SECOND bounds the number of traces per second in each
+process, so that the overhead under load stays bounded. As with metrics, the
+rule hook is only added when tracing is on, and code outside of a sampled
+trace only looks up the current trace.
+"""
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from . import rules
+
+logger = logging.getLogger(__name__)
+
+# The trace of the determination being made, if it is sampled
+current = contextvars.ContextVar("dsnap_trace", default=None)
+
+
+def new_id(size):
+    return os.urandom(size).hex()
+
+
+class Span:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start_time',
+                 'end_time', 'attributes')
+
+    def __init__(self, trace_id, parent_id, name, start_time,
+                 attributes=None):
+        self.trace_id = trace_id
+        self.span_id = new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_time = start_time
+        self.end_time = None
+        self.attributes = attributes or {}
+
+    def as_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """The spans of one determination. Spans begun while another is open
+    are its children.
+    """
+    def __init__(self, name, attributes=None):
+        self.trace_id = new_id(16)
+        self.spans = []
+        self._open = []
+        self.root = self.begin(name, attributes)
+
+    def begin(self, name, attributes=None):
+        span = self.record(name, time.time(), None, attributes)
+        self._open.append(span)
+        return span
+
+    def end(self, span):
+        span.end_time = time.time()
+        self._open.remove(span)
+
+    def record(self, name, start_time, end_time, attributes=None):
+        """Add a span which has already finished."""
+        parent = self._open[-1].span_id if self._open else None
+        span = Span(self.trace_id, parent, name, start_time, attributes)
+        span.end_time = end_time
+        self.spans.append(span)
+        return span
+
+
+class Tracer:
+    def __init__(self, exporters, sample_rate=1.0, max_per_second=None):
+        self.exporters = exporters
+        self.sample_rate = sample_rate
+        self.max_per_second = max_per_second
+        self._lock = threading.Lock()
+        self._second = None
+        self._count = 0
+
+    def sample(self):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return False
+        if self.max_per_second is None:
+            return True
+        second = int(time.monotonic())
+        with self._lock:
+            if second != self._second:
+                self._second = second
+                self._count = 0
+            if self._count >= self.max_per_second:
+                return False
+            self._count += 1
+        return True
+
+    def export(self, trace):
+        spans = [span.as_dict() for span in trace.spans]
+        for exporter in self.exporters:
+            # Tracing must never fail the determination it traces
+            try:
+                exporter.export(spans)
+            except Exception:
+                logger.exception("Failed to export trace %s", trace.trace_id)
+
+
+# The tracer of this process, or None when tracing is disabled
+tracer = None
+
+
+class TraceContext:
+    """Traces the block if it is sampled, then exports the trace."""
+    __slots__ = ('name', 'attributes', 'trace', 'token')
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.trace = None
+
+    def __enter__(self):
+        if tracer is not None and tracer.sample():
+            self.trace = Trace(self.name, self.attributes)
+            self.token = current.set(self.trace)
+        return self.trace
+
+    def __exit__(self, *exc_info):
+        if self.trace is not None:
+            current.reset(self.token)
+            self.trace.end(self.trace.root)
+            tracer.export(self.trace)
+
+
+def trace(name, **attributes):
+    """Return a context manager which traces its block when it is sampled,
+    with the trace as its target, or None when it is not.
+    """
+    return TraceContext(name, attributes)
+
+
+class SpanContext:
+    __slots__ = ('trace', 'span')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.span = trace.begin(name)
+
+    def __enter__(self):
+        return self.span
+
+    def __exit__(self, *exc_info):
+        self.trace.end(self.span)
+
+
+class NullContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_CONTEXT = NullContext()
+
+
+def span(name):
+    """Return a context manager which adds a span for its block to the
+    current trace, if there is one.
+    """
+    trace = current.get()
+    if trace is None:
+        return NULL_CONTEXT
+    return SpanContext(trace, name)
+
+
+class TracingClock:
+    """Stage clock (see `metrics.stage_clock`) which also adds a span for
+    each stage to the trace.
+    """
+    __slots__ = ('_trace', '_clock', '_last')
+
+    def __init__(self, trace, clock):
+        self._trace = trace
+        self._clock = clock
+        self._last = time.time()
+
+    def lap(self, stage):
+        now = time.time()
+        self._trace.record(stage, self._last, now)
+        self._last = now
+        self._clock.lap(stage)
+
+
+def stage_clock(clock):
+    """Return `clock`, also adding spans to the current trace if there is
+    one.
+    """
+    trace = current.get()
+    if trace is None:
+        return clock
+    return TracingClock(trace, clock)
+
+
+def rule_hook(rule, step):
+    """Step hook adding a span for the rule to the current trace."""
+    name = rule.__class__.__name__
+
+    def traced_step(application, disaster, findings, metrics):
+        trace = current.get()
+        if trace is None:
+            return step(application, disaster, findings, metrics)
+        span = trace.begin(name)
+        try:
+            successful = step(application, disaster, findings, metrics)
+        finally:
+            trace.end(span)
+        span.attributes["succeeded"] = successful
+        return successful
+    return traced_step
+
+
+class JSONLinesExporter:
+    """Appends each span to a file as a line of JSON."""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = "".join(
+            json.dumps(span, separators=(",", ":")) + "\n" for span in spans)
+        with self._lock, open(self.path, "a") as f:
+            f.write(lines)
+
+
+def configure():
+    """
+    Enable tracing when the settings ask for it, and add the rule hook.
+    Called when the app is ready, before the eligibility plan is compiled.
+    """
+    global tracer
+
+    sample_rate = getattr(settings, "TRACING_SAMPLE_RATE", 0)
+    exporters = [
+        import_string(path)(**options)
+        for (path, options) in getattr(settings, "TRACING_EXPORTERS", [])
+    ]
+    if sample_rate <= 0 or not exporters:
+        return
+    tracer = Tracer(exporters, sample_rate,
+                    getattr(settings, "TRACING_MAX_PER_SECOND", None))
+    rules.add_step_hook(rule_hook)
@@ -4,5 +4,11 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('eligibility', views.determine_eligibility, name='eligibility'),
+    path('bulk', views.bulk, name='bulk'),
     path('disasters', views.disaster_list, name='disasters'),
+    path('async/eligibility', views.adetermine_eligibility,
+         name='async-eligibility'),
+    path('async/disasters', views.adisaster_list, name='async-disasters'),
+    path('metrics', views.metrics_exposition, name='metrics'),
 ]
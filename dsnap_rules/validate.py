@@ -34,6 +34,7 @@ SCHEMA = {
         "total_take_home_income": {"type": "number", "minimum": 0},
         "worked_in_disaster_area_at_disaster_time": {"type": "boolean"},
         "receives_SNAP_benefits": {"type": "boolean"},
+        "region_category": {"type": "string"},
         "residence_state": {"type": "string"},
     },
     "required": [
@@ -55,9 +56,92 @@ SCHEMA = {
 }
 
 
+# Python types accepted by the fast path for each JSON Schema type. `bool` is
+# deliberately not accepted for numbers, as JSON Schema does not treat
+# booleans as numbers
+FAST_PATH_TYPES = {
+    "boolean": "(bool,)",
+    "integer": "(int,)",
+    "number": "(int, float)",
+    "object": "(dict,)",
+    "string": "(str,)",
+}
+
+FAST_PATH_KEYWORDS = {
+    "$schema", "type", "properties", "required", "additionalProperties",
+    "minimum",
+}
+
+
+def generate_fast_path(schema, name="fast_validate"):
+    """
+    Generate the source of a function that returns `True` if a payload is
+    valid against the schema, using only plain Python type, `minimum` and
+    `required` checks. It may reject valid payloads it cannot check, such as
+    integral floats given for integers, so a rejection must be confirmed with
+    the full validator.
+    """
+    lines = [f"def {name}(data):"]
+    constants = {}
+    emit_checks(schema, "data", lines, constants, depth=1)
+    lines.append("    return True")
+    return "\n".join(lines) + "\n", constants
+
+
+def emit_checks(schema, variable, lines, constants, depth):
+    indent = "    " * depth
+    if not FAST_PATH_KEYWORDS.issuperset(schema):
+        lines.append(f"{indent}return False")
+        return
+
+    schema_type = schema.get("type")
+    if schema_type is not None:
+        if schema_type not in FAST_PATH_TYPES:
+            lines.append(f"{indent}return False")
+            return
+        lines.append(f"{indent}if type({variable}) not in "
+                     f"{FAST_PATH_TYPES[schema_type]}:")
+        lines.append(f"{indent}    return False")
+
+    if "minimum" in schema:
+        lines.append(f"{indent}if {variable} < {schema['minimum']!r}:")
+        lines.append(f"{indent}    return False")
+
+    properties = schema.get("properties", {})
+    if schema.get("required"):
+        constant = f"REQUIRED_{len(constants)}"
+        constants[constant] = frozenset(schema["required"])
+        lines.append(f"{indent}if not {constant}.issubset({variable}):")
+        lines.append(f"{indent}    return False")
+    if schema.get("additionalProperties") is False:
+        constant = f"ALLOWED_{len(constants)}"
+        constants[constant] = frozenset(properties)
+        lines.append(f"{indent}if not {constant}.issuperset({variable}):")
+        lines.append(f"{indent}    return False")
+
+    for index, (key, subschema) in enumerate(sorted(properties.items())):
+        value = f"{variable}_{index}"
+        lines.append(f"{indent}if {key!r} in {variable}:")
+        lines.append(f"{indent}    {value} = {variable}[{key!r}]")
+        emit_checks(subschema, value, lines, constants, depth + 1)
+
+
+def compile_fast_path(schema):
+    source, namespace = generate_fast_path(schema)
+    exec(compile(source, "<validate fast path>", "exec"), namespace)
+    return namespace["fast_validate"]
+
+
+VALIDATOR = Draft7Validator(SCHEMA)
+
+fast_validate = compile_fast_path(SCHEMA)
+
+
 def validate(data):
-    error_messages = [
-        error.message for error in Draft7Validator(SCHEMA).iter_errors(data)]
+    if fast_validate(data):
+        return True, []
+
+    error_messages = [error.message for error in VALIDATOR.iter_errors(data)]
     if error_messages:
         return False, error_messages
     else:
@@ -1,78 +1,159 @@
+import json
 import logging
 
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import render
-from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework.decorators import api_view
-from rest_framework.response import Response
-
-from .dsnap_application import DSNAPApplication
-from .dsnap_rules import (
-    AdverseEffectRule,
-    AuthorizedRule,
-    DisasterAreaResidencyRule,
-    FoodPurchaseRule,
-    IncomeAndResourceRule,
-    StateResidencyRule,
-    SNAPSupplementalBenefitsRule,
-)
+
+from . import eligibility, metrics, reference_data, tracing
+from .eligibility import (
+    adetermine, determine, iter_ndjson, render_determinations)
 from .models import Disaster
-from .rules import And
-from .serializers import DisasterSerializer
-from .validate import validate
+from .renderers import renderer, wants_compact
+from .result_cache import results
+from .routers import replica_reads
+from .rules import ALL_FINDINGS, EVALUATION_MODES
 
 logger = logging.getLogger(__name__)
 
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl")
+
 
 @api_view(['GET', 'POST'])
 @csrf_exempt
 def index(request):
     if request.method == 'GET':
-        disasters = Disaster.objects.order_by('disaster_request_no')
-        context = {"disaster_list": disasters}
-        return render(request, 'dsnap_rules/demo_form.html', context)
+        return conditional(
+            request, reference_data.disasters_stamp(), demo_form)
+
+    mode = request.query_params.get("mode", ALL_FINDINGS)
+    if mode not in EVALUATION_MODES:
+        return unsupported_mode(mode)
+
+    return determination_response(
+        request.data, mode, wants_compact(request))
+
+
+@csrf_exempt
+@require_POST
+def determine_eligibility(request):
+    """
+    Determines eligibility for a single application, like a POST to the index,
+    but without DRF's request and response handling.
+    """
+    mode = request.GET.get("mode", ALL_FINDINGS)
+    if mode not in EVALUATION_MODES:
+        return unsupported_mode(mode)
 
     try:
-        valid, messages = validate(request.data)
-        if not valid:
-            response = jsonify(message=messages)
+        payload = json.loads(request.body)
+    except ValueError:
+        response = jsonify(message="Invalid JSON")
+        response.status_code = 400
+        return response
+
+    return determination_response(payload, mode, wants_compact(request))
+
+
+@replica_reads()
+def demo_form(request):
+    disasters = Disaster.objects.order_by('disaster_request_no')
+    context = {"disaster_list": disasters}
+    return render(request, 'dsnap_rules/demo_form.html', context)
+
+
+def determination_response(payload, mode, compact=False):
+    with tracing.trace("determination", mode=mode) as trace:
+        content = results.get(results.key(payload, mode, compact))
+        if content is not None:
+            if trace is not None:
+                trace.root.attributes["cached"] = True
+            return HttpResponse(content, content_type="application/json")
+
+        clock = tracing.stage_clock(metrics.stage_clock())
+        try:
+            status, body = determine(payload, mode=mode, clock=clock)
+        except Exception:
+            logger.exception("Failed to determine eligibility")
+            raise
+
+        content = renderer.render(body, compact)
+        clock.lap("render")
+        if trace is not None:
+            trace.root.attributes["status"] = status
+        if status == 200:
+            # The disaster has been loaded now, so the key has its version
+            results.set(results.key(payload, mode, compact), content)
+        return HttpResponse(
+            content, content_type="application/json", status=status)
+
+
+def unsupported_mode(mode):
+    response = jsonify(message="Evaluation mode {} not supported".format(
+        mode))
+    response.status_code = 400
+    return response
+
+
+@csrf_exempt
+@require_POST
+def bulk(request):
+    """
+    Determines eligibility for many applications in one request. The body is
+    either a JSON array of application payloads or, with an
+    `application/x-ndjson` content type, one payload per line. Results are
+    streamed back as NDJSON in input order, one line per application, each
+    with the application's `index` and the `status` it would have received
+    from the single application endpoint.
+    """
+    mode = request.GET.get("mode", ALL_FINDINGS)
+    if mode not in EVALUATION_MODES:
+        return unsupported_mode(mode)
+
+    if request.content_type in NDJSON_CONTENT_TYPES:
+        payloads = iter_ndjson(request)
+    else:
+        try:
+            payloads = json.load(request)
+        except ValueError:
+            payloads = None
+        if not isinstance(payloads, list):
+            response = jsonify(message="Expected a JSON array of applications")
             response.status_code = 400
             return response
-    except Exception:
-        logger.exception("Failed validation")
 
-    try:
-        disaster = Disaster.objects.get(
-            pk=request.data["disaster_id"])
-    except Disaster.DoesNotExist:
-        response = jsonify(message="Disaster {} not found".format(
-            request.data["disaster_id"]))
-        response.status_code = 404
-        return response
-    except Exception:
-        logger.exception("Failed to retrieve a disaster")
+    return StreamingHttpResponse(
+        stream_determinations(payloads, mode),
+        content_type="application/x-ndjson")
 
-    try:
-        application = DSNAPApplication(request.data)
-        result = And(
-            AuthorizedRule(),
-            AdverseEffectRule(),
-            FoodPurchaseRule(),
-            DisasterAreaResidencyRule(),
-            StateResidencyRule(),
-            SNAPSupplementalBenefitsRule(),
-            IncomeAndResourceRule()
-        ).execute(application, disaster)
-
-        return jsonify(
-            eligible=result.successful,
-            findings=result.findings,
-            metrics=result.metrics,
-            state=disaster.state.abbreviation
-        )
-    except Exception:
-        logger.exception("Failed to execute rules")
+
+def stream_determinations(payloads, mode):
+    disasters = {}
+
+    def get_disaster(disaster_id):
+        if disaster_id not in disasters:
+            try:
+                disasters[disaster_id] = eligibility.get_disaster(
+                    disaster_id)
+            except Disaster.DoesNotExist:
+                disasters[disaster_id] = None
+        if disasters[disaster_id] is None:
+            raise Disaster.DoesNotExist
+        return disasters[disaster_id]
+
+    return render_determinations(payloads, mode, get_disaster)
 
 
 @api_view(['GET'])
@@ -82,12 +163,110 @@ def disaster_list(request):
     Returns active disasters, i.e., disasters that have one or more application
     periods which have registration periods that span the current date
     """
-    today = timezone.localdate()
-    disasters = Disaster.objects.filter(
-        application_periods__registration_begin_date__lte=today).filter(
-        application_periods__registration_end_date__gte=today).distinct()
-    serializer = DisasterSerializer(disasters, many=True)
-    return Response(serializer.data)
+    return conditional(
+        request, reference_data.active_disasters_stamp(), active_disasters)
+
+
+def active_disasters(request):
+    return HttpResponse(
+        reference_data.active_disasters_body(),
+        content_type="application/json")
+
+
+async def adetermine_eligibility(request):
+    """
+    Asynchronous version of `determine_eligibility`, for the ASGI
+    application.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    mode = request.GET.get("mode", ALL_FINDINGS)
+    if mode not in EVALUATION_MODES:
+        return unsupported_mode(mode)
+
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        response = jsonify(message="Invalid JSON")
+        response.status_code = 400
+        return response
+
+    try:
+        status, body = await adetermine(payload, mode=mode)
+    except Exception:
+        logger.exception("Failed to determine eligibility")
+        raise
+
+    return HttpResponse(
+        renderer.render(body, wants_compact(request)),
+        content_type="application/json",
+        status=status)
+
+
+# The csrf_exempt decorator only supports async views from Django 5.0
+adetermine_eligibility.csrf_exempt = True
+
+
+async def adisaster_list(request):
+    """
+    Asynchronous version of `disaster_list`, for the ASGI application. The
+    cache lookup, and the query and serialization on a miss, run in a worker
+    thread.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    stamp = await sync_to_async(reference_data.active_disasters_stamp)()
+    response = not_modified(request, stamp)
+    if response is None:
+        body = await sync_to_async(reference_data.active_disasters_body)()
+        response = HttpResponse(body, content_type="application/json")
+    return set_validators(response, stamp)
+
+
+def conditional(request, stamp, view):
+    """
+    Respond with 304 Not Modified when the request's If-None-Match or
+    If-Modified-Since header matches `stamp`, and otherwise call `view`. The
+    response carries the validators either way.
+    """
+    response = not_modified(request, stamp)
+    if response is None:
+        response = view(request)
+    return set_validators(response, stamp)
+
+
+def not_modified(request, stamp):
+    if request.method not in ("GET", "HEAD"):
+        return None
+    return get_conditional_response(
+        request,
+        etag=quote_etag(stamp.etag),
+        last_modified=int(stamp.last_modified.timestamp()))
+
+
+def set_validators(response, stamp):
+    if response.status_code in (200, 304):
+        response["ETag"] = quote_etag(stamp.etag)
+        response["Last-Modified"] = http_date(
+            stamp.last_modified.timestamp())
+        patch_cache_control(
+            response, public=True, must_revalidate=True,
+            max_age=settings.REFERENCE_DATA_MAX_AGE)
+    return response
+
+
+def metrics_exposition(request):
+    """
+    Returns the metrics of every worker in the Prometheus text format, when
+    metrics are enabled
+    """
+    if metrics.registry is None:
+        raise Http404("Metrics are not enabled")
+    return HttpResponse(
+        metrics.registry.collect().exposition(),
+        content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 def jsonify(**kwargs):
@@ -0,0 +1,17 @@
+"""
+ASGI config for rules_service project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+The asynchronous views are served under /async/.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rules_service.settings')
+
+application = get_asgi_application()
@@ -29,14 +29,14 @@ ALLOWED_HOSTS = [
     '.app.cloud.gov',
 ]
 
-CORS_ORIGIN_WHITELIST = [
-    'localhost',
-    '127.0.0.1'
+CORS_ALLOWED_ORIGINS = [
+    'http://localhost',
+    'http://127.0.0.1',
 ]
 
-CORS_ORIGIN_REGEX_WHITELIST = (
-    r'^https?://dsnap-registration.*\.app\.cloud\.gov$'
-)
+CORS_ALLOWED_ORIGIN_REGEXES = [
+    r'^https?://dsnap-registration.*\.app\.cloud\.gov$',
+]
 
 # Application definition
 
@@ -90,6 +90,87 @@ WSGI_APPLICATION = 'rules_service.wsgi.application'
 DATABASES = {}
 DATABASES['default'] = dj_database_url.config(conn_max_age=600)
 
+# The primary key type of the existing migrations
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
+# Read replicas of the default database, as comma-separated database URLs.
+# Reference data reads go to a random replica, unless the reference data
+# changed in the last REPLICA_LAG seconds; see dsnap_rules.routers. Tests
+# read the replicas from the default database.
+REPLICA_DATABASES = []
+for i, url in enumerate(
+        url for url in os.getenv('REPLICA_DATABASE_URLS', '').split(',')
+        if url):
+    alias = f'replica{i + 1}'
+    DATABASES[alias] = dj_database_url.parse(url, conn_max_age=600)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(alias)
+REPLICA_LAG = int(os.getenv('REPLICA_LAG', 10))
+
+DATABASE_ROUTERS = ['dsnap_rules.routers.ReplicaRouter']
+
+# PostgreSQL connections are pooled, so that the greenlets of a gevent worker
+# share at most DATABASE_POOL_SIZE connections per process rather than each
+# keeping one open; see dsnap_rules.connection_pool. A request waits up to
+# DATABASE_POOL_TIMEOUT seconds for a connection, and connections idle for
+# DATABASE_POOL_CHECK_AFTER seconds are checked before reuse. A
+# DATABASE_POOL_SIZE of 0 disables the pool.
+DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', 10))
+if DATABASE_POOL_SIZE:
+    for database in DATABASES.values():
+        # Older dj-database-url versions name the backend postgresql_psycopg2
+        if database.get('ENGINE') in ('django.db.backends.postgresql',
+                                      'django.db.backends.postgresql_psycopg2'):
+            database['ENGINE'] = 'dsnap_rules.pooled_postgresql'
+            database['CONN_MAX_AGE'] = 0
+            database['POOL'] = {
+                'max_size': DATABASE_POOL_SIZE,
+                'timeout': float(os.getenv('DATABASE_POOL_TIMEOUT', 30)),
+                'check_after': float(
+                    os.getenv('DATABASE_POOL_CHECK_AFTER', 30)),
+            }
+
+
+# Bytes of rendered determinations kept in each process for identical
+# re-submissions; 0 disables the cache
+RESULT_CACHE_MAX_BYTES = int(
+    os.getenv('RESULT_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+
+# Seconds for which the reference data version is cached; it is also cleared
+# on admin edits. The rules and /disasters read a snapshot of the reference
+# data, which is reloaded when the version changes. REFERENCE_DATA_MAX_AGE is
+# the max-age clients and shared caches may reuse /disasters and the demo form
+# for without revalidating.
+REFERENCE_DATA_TTL = int(os.getenv('REFERENCE_DATA_TTL', 300))
+REFERENCE_DATA_MAX_AGE = int(os.getenv('REFERENCE_DATA_MAX_AGE', 0))
+
+
+# Rule and stage timings and counters, served on /metrics in the Prometheus
+# text format. With METRICS_DIR set, each process writes its metrics to a
+# file there every METRICS_FLUSH_INTERVAL seconds and /metrics reports the
+# total of all processes.
+METRICS_ENABLED = bool(os.getenv('METRICS_ENABLED'))
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1))
+
+# Tracing of determinations, see dsnap_rules.tracing. A fraction
+# TRACING_SAMPLE_RATE of determinations are traced, up to
+# TRACING_MAX_PER_SECOND per process, and their spans are passed to each
+# (dotted path, options) exporter. TRACING_FILE adds an exporter writing
+# spans to a JSON lines file.
+TRACING_SAMPLE_RATE = float(os.getenv('TRACING_SAMPLE_RATE', 0))
+TRACING_MAX_PER_SECOND = int(os.getenv('TRACING_MAX_PER_SECOND', 10))
+TRACING_EXPORTERS = []
+if os.getenv('TRACING_FILE'):
+    TRACING_EXPORTERS.append((
+        'dsnap_rules.tracing.JSONLinesExporter',
+        {'path': os.getenv('TRACING_FILE')}))
+
+# JSON files registering additional Income and Allotment Calculators, see
+# dsnap_rules.income_allotment_calculator.load_calculators
+CALCULATOR_FILES = [
+    path for path in os.getenv('CALCULATOR_FILES', '').split(',') if path]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
@@ -0,0 +1,41 @@
+import pytest
+from django.core.cache import cache
+
+from dsnap_rules.active_disasters import registry
+from dsnap_rules.disaster_cache import disasters
+from dsnap_rules.result_cache import results
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with empty caches, since the test database is rolled
+    back without sending the signals that invalidate cached data.
+    """
+    cache.clear()
+    disasters.invalidate()
+    results.invalidate()
+    registry.invalidate()
+    yield
+    cache.clear()
+    disasters.invalidate()
+    results.invalidate()
+    registry.invalidate()
+
+
+BENCHMARK_REPORT = pytest.StashKey[list]()
+
+
+@pytest.fixture(scope="session")
+def benchmark_report(pytestconfig):
+    """Lines written to the summary at the end of the session, so that
+    benchmarks report without printing while tests run.
+    """
+    return pytestconfig.stash.setdefault(BENCHMARK_REPORT, [])
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    lines = config.stash.get(BENCHMARK_REPORT, [])
+    if lines:
+        terminalreporter.write_sep("-", "benchmarks")
+        for line in lines:
+            terminalreporter.write_line(line)
@@ -0,0 +1,107 @@
+import random
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from . import factories
+from dsnap_rules import active_disasters
+from dsnap_rules.active_disasters import ActiveDisasters, IntervalIndex
+from dsnap_rules.models import County, State
+
+
+def test_interval_index():
+    day = date(2019, 3, 1)
+    index = IntervalIndex([
+        (1, day, day + timedelta(days=2)),
+        (2, day + timedelta(days=2), day + timedelta(days=3)),
+        (3, day + timedelta(days=4), day + timedelta(days=4)),
+        (4, day + timedelta(days=1), day),
+    ])
+
+    assert [index.open_on(day + timedelta(days=i)) for i in range(-1, 6)] \
+        == [set(), {1}, {1}, {1, 2}, {2}, {3}, set()]
+
+
+def test_interval_index_matches_scan():
+    rng = random.Random(0)
+    start = date(2010, 1, 1)
+    windows = []
+    for period in range(500):
+        begin = start + timedelta(days=rng.randrange(3650))
+        windows.append(
+            (period, begin, begin + timedelta(days=rng.randrange(30))))
+    index = IntervalIndex(windows)
+
+    for _ in range(200):
+        day = start + timedelta(days=rng.randrange(-10, 3700))
+        assert index.open_on(day) == {
+            period for (period, begin, end) in windows if begin <= day <= end}
+
+
+def test_active_disasters_by_county():
+    day = date(2019, 3, 1)
+    active = ActiveDisasters(
+        [(1, 10, day, day), (2, 10, day, day), (3, 20, day, day),
+         (4, 30, day - timedelta(days=5), day - timedelta(days=1))],
+        [(1, 100), (2, 100), (3, 200), (4, 100)])
+
+    assert active.on(day) == {10, 20}
+    assert active.in_county(100, day) == {10}
+    assert active.in_county(200, day) == {20}
+    assert active.in_county(300, day) == set()
+    assert active.in_county(100, day - timedelta(days=1)) == {30}
+
+
+def period(disaster, begin, end, counties=()):
+    today = timezone.localdate()
+    period = factories.ApplicationPeriodFactory(
+        disaster=disaster,
+        registration_begin_date=today + timedelta(days=begin),
+        registration_end_date=today + timedelta(days=end))
+    period.counties.add(*counties)
+    return period
+
+
+@pytest.mark.django_db
+def test_registry(django_assert_num_queries):
+    state = State.objects.get(abbreviation="FL")
+    county = County.objects.create(name="Dade", state=state)
+    active = factories.DisasterFactory(state=state)
+    period(active, -1, 1, [county])
+    elsewhere = factories.DisasterFactory(state=state)
+    period(elsewhere, -1, 1)
+    future = factories.DisasterFactory(state=state)
+    period(future, 2, 5, [county])
+    registry = active_disasters.registry
+
+    assert registry.disaster_ids() == {active.id, elsewhere.id}
+    with django_assert_num_queries(0):
+        assert registry.disaster_ids() == {active.id, elsewhere.id}
+        assert registry.county_disaster_ids(county.id) == {active.id}
+        tomorrow = timezone.localdate() + timedelta(days=2)
+        assert registry.disaster_ids(tomorrow) == {future.id}
+        assert registry.county_disaster_ids(county.id, tomorrow) == {
+            future.id}
+
+    # Past midnight, from the same index
+    with patch.object(timezone, "localdate", return_value=tomorrow), \
+            django_assert_num_queries(0):
+        assert registry.disaster_ids() == {future.id}
+
+
+@pytest.mark.django_db
+def test_registry_is_rebuilt_on_edit(client):
+    disaster = factories.DisasterFactory()
+    registry = active_disasters.registry
+    assert registry.disaster_ids() == set()
+
+    saved = period(disaster, -1, 1)
+    assert registry.disaster_ids() == {disaster.id}
+    assert [d["id"] for d in client.get('/disasters').json()] == [disaster.id]
+
+    saved.registration_end_date -= timedelta(days=2)
+    saved.save()
+    assert registry.disaster_ids() == set()
+    assert client.get('/disasters').json() == []
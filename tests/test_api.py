@@ -1,4 +1,5 @@
 import copy
+import json
 from datetime import timedelta
 from unittest.mock import patch
 
@@ -14,6 +15,8 @@ from dsnap_rules.dsnap_rules import (
     StateResidencyRule,
     SNAPSupplementalBenefitsRule,
 )
+from dsnap_rules.income_allotment_calculator import AK_RURAL1_Calculator
+from dsnap_rules.models import State
 
 GOOD_PAYLOAD = {
     "disaster_id": 42,
@@ -76,8 +79,8 @@ def test_invalid_disaster(client):
 def test_valid_disaster(get_calculator_mock, client):
     LIMIT = 500
     ALLOTMENT = 100
-    get_calculator_mock.return_value.get_limit.return_value = LIMIT
-    get_calculator_mock.return_value.get_allotment.return_value = ALLOTMENT
+    get_calculator_mock.return_value.get_limit_and_allotment.return_value = (
+        LIMIT, ALLOTMENT)
     disaster = factories.DisasterFactory(
         residency_required=True,
         uses_DSED=False,
@@ -140,8 +143,8 @@ def test_valid_disaster(get_calculator_mock, client):
 def test_basic_ineligible_payload(get_calculator_mock, client):
     LIMIT = 500
     ALLOTMENT = 100
-    get_calculator_mock.return_value.get_limit.return_value = LIMIT
-    get_calculator_mock.return_value.get_allotment.return_value = ALLOTMENT
+    get_calculator_mock.return_value.get_limit_and_allotment.return_value = (
+        LIMIT, ALLOTMENT)
     disaster = factories.DisasterFactory(
         residency_required=True,
         uses_DSED=False,
@@ -200,6 +203,142 @@ def test_basic_ineligible_payload(get_calculator_mock, client):
     }
 
 
+@pytest.mark.django_db
+@patch('dsnap_rules.income_allotment_calculator.get_calculator')
+def test_first_failure_mode_skips_remaining_rules(
+        get_calculator_mock, client):
+    disaster = factories.DisasterFactory(
+        residency_required=True,
+        uses_DSED=False,
+        allows_food_loss_alone=True,
+    )
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    payload["disaster_id"] = disaster.id
+    payload["residence_state"] = "XX"
+    response = client.post('/?mode=success_or_first_failure', data=payload,
+                           content_type="application/json")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "eligible": False,
+        "findings": [
+            {
+                "rule": "StateResidencyRule",
+                "succeeded": False,
+                "text": StateResidencyRule.failure_finding
+            },
+        ],
+        "metrics": {},
+        "state": disaster.state.abbreviation
+    }
+    get_calculator_mock.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_alaska_region_category(client):
+    disaster = factories.DisasterFactory(
+        state=State.objects.get(abbreviation="AK"),
+        uses_DSED=False,
+    )
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    payload["disaster_id"] = disaster.id
+    payload["residence_state"] = "AK"
+
+    response = client.post('/', data=payload, content_type="application/json")
+    assert response.status_code == 400
+    assert response.json() == {
+        "message": ["No calculator for region category None in AK"]
+    }
+
+    payload["region_category"] = "RURAL1"
+    response = client.post('/', data=payload, content_type="application/json")
+    assert response.status_code == 200
+    assert response.json()["metrics"] == {
+        "allotment": AK_RURAL1_Calculator.get_allotment(
+            payload["size_of_household"])
+    }
+
+
+def test_unknown_evaluation_mode(client):
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    response = client.post('/?mode=fastest', data=payload,
+                           content_type="application/json")
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "message": "Evaluation mode fastest not supported"
+    }
+
+
+@pytest.mark.django_db
+@patch('dsnap_rules.income_allotment_calculator.get_calculator')
+def test_bulk_json_array(get_calculator_mock, client):
+    get_calculator_mock.return_value.get_limit_and_allotment.return_value = (
+        500, 100)
+    disaster = factories.DisasterFactory(
+        residency_required=True,
+        uses_DSED=False,
+        allows_food_loss_alone=True,
+    )
+    eligible = copy.deepcopy(GOOD_PAYLOAD)
+    eligible["disaster_id"] = disaster.id
+    eligible["residence_state"] = disaster.state.abbreviation
+    invalid = copy.deepcopy(eligible)
+    del invalid["is_head_of_household"]
+    missing_disaster = copy.deepcopy(eligible)
+    missing_disaster["disaster_id"] = disaster.id + 1
+
+    response = client.post(
+        '/bulk', data=[eligible, invalid, missing_disaster],
+        content_type="application/json")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = [json.loads(line)
+             for line in b"".join(response.streaming_content).splitlines()]
+    single = client.post('/', data=eligible, content_type="application/json")
+    assert lines[0] == {"index": 0, "status": 200, **single.json()}
+    assert lines[1] == {
+        "index": 1,
+        "status": 400,
+        "message": ["'is_head_of_household' is a required property"]
+    }
+    assert lines[2] == {
+        "index": 2,
+        "status": 404,
+        "message": "Disaster {} not found".format(disaster.id + 1)
+    }
+
+
+@pytest.mark.django_db
+def test_bulk_ndjson(client):
+    disaster = factories.DisasterFactory(uses_DSED=True)
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    payload["disaster_id"] = disaster.id
+    body = "\n".join(
+        [json.dumps(payload), "", "{not json", json.dumps(payload)])
+
+    response = client.post('/bulk', data=body,
+                           content_type="application/x-ndjson")
+
+    assert response.status_code == 200
+    lines = [json.loads(line)
+             for line in b"".join(response.streaming_content).splitlines()]
+    assert [(line["index"], line["status"]) for line in lines] == [
+        (0, 200), (1, 400), (2, 200)]
+    assert lines[1]["message"] == ["Invalid JSON"]
+
+
+def test_bulk_requires_array(client):
+    response = client.post('/bulk', data=GOOD_PAYLOAD,
+                           content_type="application/json")
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "message": "Expected a JSON array of applications"
+    }
+
+
 @pytest.mark.django_db
 def test_get_disasters_with_single_application_periods(client):
     today = timezone.localdate()
@@ -284,3 +423,14 @@ def test_get_disasters_with_multiple_application_periods(client):
     returned_titles = [d['title'] for d in response.json()]
     assert disaster_with_2_active_periods.title in returned_titles
     assert disaster_with_1_active_1_future_period.title in returned_titles
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("origin, allowed", [
+    ("http://localhost", True),
+    ("https://dsnap-registration-dev.app.cloud.gov", True),
+    ("https://attacker.example.com", False),
+])
+def test_cors_origins(client, origin, allowed):
+    response = client.get('/disasters', HTTP_ORIGIN=origin)
+    assert ('Access-Control-Allow-Origin' in response) == allowed
@@ -0,0 +1,72 @@
+import copy
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.utils import timezone
+
+from . import factories
+from .test_api import GOOD_PAYLOAD
+from dsnap_rules.disaster_cache import disasters
+
+
+def request(method, *args, **kwargs):
+    async def send():
+        return await getattr(AsyncClient(), method)(*args, **kwargs)
+    return async_to_sync(send)()
+
+
+@pytest.mark.django_db
+def test_async_eligibility_matches_index(client):
+    disaster = factories.DisasterFactory(uses_DSED=True)
+    disasters.invalidate()
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    payload["disaster_id"] = disaster.id
+
+    response = request(
+        'post', '/async/eligibility', data=payload,
+        content_type="application/json")
+
+    assert response.status_code == 200
+    index = client.post('/', data=payload, content_type="application/json")
+    assert response.json() == index.json()
+
+
+@pytest.mark.django_db
+def test_async_eligibility_errors():
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    disasters.invalidate()
+
+    response = request(
+        'post', '/async/eligibility', data=payload,
+        content_type="application/json")
+    assert response.status_code == 404
+    assert response.json() == {
+        "message": "Disaster {} not found".format(payload["disaster_id"])
+    }
+
+    response = request('get', '/async/eligibility')
+    assert response.status_code == 405
+
+
+@pytest.mark.django_db
+def test_async_disaster_list(client):
+    today = timezone.localdate()
+    period = factories.ApplicationPeriodFactory.build(
+        registration_begin_date=today - timedelta(days=1),
+        registration_end_date=today + timedelta(days=5),
+    )
+    disaster = factories.DisasterFactory()
+    disaster.application_periods.add(period, bulk=False)
+
+    response = request('get', '/async/disasters')
+
+    assert response.status_code == 200
+    assert response.json() == client.get('/disasters').json()
+
+    etag = response["ETag"]
+    response = request(
+        'get', '/async/disasters', headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response["ETag"] == etag
@@ -0,0 +1,165 @@
+import itertools
+import random
+
+import pytest
+
+from dsnap_rules import batch
+from dsnap_rules.dsnap_application import DSNAPApplication
+from dsnap_rules.dsnap_rules import ELIGIBILITY_PLAN, ELIGIBILITY_RULES
+from dsnap_rules.income_allotment_calculator import CalculatorNotFound
+from dsnap_rules.rules import FIRST_FAILURE, And
+from dsnap_rules.models import Disaster, State
+
+
+def random_payloads(count, seed=0):
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(count):
+        payload = {
+            name: rng.random() < 0.8 for name in batch.BOOLEAN_FIELDS
+        }
+        payload.update({
+            "disaster_id": 1,
+            "receives_SNAP_benefits": rng.random() < 0.2,
+            "residence_state": rng.choice(["FL", "FL", "GA"]),
+            "size_of_household": rng.randint(1, 12),
+            "total_take_home_income": rng.randint(0, 6000),
+            "accessible_liquid_resources": rng.choice([0, 150, 99.5]),
+            "disaster_expenses": {
+                "food_loss": rng.choice([0, 0, 40]),
+                "other": rng.choice([0, 0, 25]),
+            },
+        })
+        payloads.append(payload)
+    return payloads
+
+
+@pytest.mark.parametrize(
+    "residency_required, uses_DSED, allows_food_loss_alone",
+    list(itertools.product([True, False], repeat=3)))
+def test_batch_matches_scalar_rules(
+        residency_required, uses_DSED, allows_food_loss_alone):
+    disaster = Disaster(
+        state=State(abbreviation="FL"),
+        residency_required=residency_required,
+        uses_DSED=uses_DSED,
+        allows_food_loss_alone=allows_food_loss_alone,
+    )
+    payloads = random_payloads(200)
+
+    result = batch.evaluate(payloads, disaster)
+
+    assert len(result) == len(payloads)
+    for index, payload in enumerate(payloads):
+        expected = ELIGIBILITY_PLAN.execute(
+            DSNAPApplication(payload), disaster)
+        actual = result.result(index)
+        assert actual.successful is expected.successful
+        assert actual.findings == expected.findings
+        assert actual.metrics == expected.metrics
+        assert result.eligible[index] == expected.successful
+        assert result.allotment[index] == expected.metrics.get("allotment", 0)
+
+
+@pytest.mark.parametrize("other", [0, 25])
+def test_float_food_loss_matches_scalar_findings(other):
+    disaster = Disaster(
+        state=State(abbreviation="FL"),
+        residency_required=False,
+        uses_DSED=False,
+        allows_food_loss_alone=False,
+    )
+    payloads = random_payloads(2)
+    for payload in payloads:
+        payload["accessible_liquid_resources"] = 0
+        payload["disaster_expenses"] = {"food_loss": 40.5, "other": other}
+
+    result = batch.evaluate(payloads, disaster)
+
+    for index, payload in enumerate(payloads):
+        expected = ELIGIBILITY_PLAN.execute(
+            DSNAPApplication(payload), disaster)
+        assert result.result(index).findings == expected.findings
+
+
+def test_finding_codes():
+    disaster = Disaster(
+        state=State(abbreviation="FL"),
+        residency_required=True,
+        uses_DSED=False,
+        allows_food_loss_alone=True,
+    )
+    payloads = random_payloads(3)
+    payloads[0]["resided_in_disaster_area_at_disaster_time"] = True
+    payloads[1]["resided_in_disaster_area_at_disaster_time"] = False
+    payloads[1]["worked_in_disaster_area_at_disaster_time"] = True
+    payloads[2]["resided_in_disaster_area_at_disaster_time"] = False
+    payloads[2]["worked_in_disaster_area_at_disaster_time"] = False
+
+    result = batch.evaluate(payloads, disaster)
+
+    assert result.finding_codes["DisasterAreaResidencyRule"].tolist() == [
+        0, 2, 3]
+
+
+def test_region_categories():
+    disaster = Disaster(
+        state=State(abbreviation="AK"),
+        residency_required=False,
+        uses_DSED=False,
+        allows_food_loss_alone=True,
+    )
+    payloads = random_payloads(30)
+    for index, payload in enumerate(payloads):
+        payload["region_category"] = ["URBAN", "RURAL1", "RURAL2"][index % 3]
+
+    result = batch.evaluate(payloads, disaster)
+
+    for index, payload in enumerate(payloads):
+        expected = ELIGIBILITY_PLAN.execute(
+            DSNAPApplication(payload), disaster)
+        assert result.result(index).findings == expected.findings
+        assert result.result(index).metrics == expected.metrics
+
+
+@pytest.mark.parametrize("region_categories", [
+    ["URBAN", "SUBURBAN"], ["SUBURBAN"]])
+def test_rows_without_a_calculator_are_errors(region_categories):
+    disaster = Disaster(
+        state=State(abbreviation="AK"),
+        residency_required=False,
+        uses_DSED=False,
+        allows_food_loss_alone=True,
+    )
+    payloads = random_payloads(4)
+    for index, payload in enumerate(payloads):
+        payload["region_category"] = region_categories[
+            index % len(region_categories)]
+
+    result = batch.evaluate(payloads, disaster)
+
+    for index, payload in enumerate(payloads):
+        if payload["region_category"] == "SUBURBAN":
+            with pytest.raises(CalculatorNotFound) as scalar:
+                ELIGIBILITY_PLAN.execute(DSNAPApplication(payload), disaster)
+            with pytest.raises(CalculatorNotFound) as columnar:
+                result.result(index)
+            assert str(columnar.value) == str(scalar.value)
+            assert not result.eligible[index]
+            assert result.allotment[index] == 0
+        else:
+            assert index not in result.errors
+            assert result.result(index) == ELIGIBILITY_PLAN.execute(
+                DSNAPApplication(payload), disaster)
+
+
+def test_only_all_findings_mode_is_supported():
+    disaster = Disaster(
+        state=State(abbreviation="FL"),
+        residency_required=False,
+        uses_DSED=False,
+        allows_food_loss_alone=True,
+    )
+    rule = And(*ELIGIBILITY_RULES.rules, mode=FIRST_FAILURE)
+    with pytest.raises(ValueError):
+        batch.evaluate(random_payloads(2), disaster, rule)
@@ -0,0 +1,126 @@
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from .test_evaluate_batch import bulk_results, input_lines  # noqa: F401
+from dsnap_rules import batch_jobs
+from dsnap_rules.models import BatchChunk, BatchJob
+
+
+@pytest.fixture
+def input_path(tmp_path, input_lines):  # noqa: F811
+    path = tmp_path / "applications.jsonl"
+    path.write_text("\n".join(input_lines) + "\n")
+    return path
+
+
+@pytest.mark.django_db
+def test_create_job_records_chunk_offsets(input_path):
+    job = batch_jobs.create_job(str(input_path), chunk_size=4)
+
+    chunks = list(job.chunks.order_by('number'))
+    assert [chunk.first_index for chunk in chunks] == [0, 4, 8, 12, 16, 20]
+    assert chunks[0].start_offset == 0
+    assert chunks[-1].end_offset == input_path.stat().st_size
+    assert all(a.end_offset == b.start_offset
+               for a, b in zip(chunks, chunks[1:]))
+    assert job.status == BatchJob.PENDING
+
+
+@pytest.mark.django_db
+def test_results_match_bulk_endpoint(client, input_path, input_lines):  # noqa
+    job = batch_jobs.create_job(str(input_path), chunk_size=4)
+
+    assert batch_jobs.work(job, "worker") == 6
+
+    job.refresh_from_db()
+    assert job.status == BatchJob.COMPLETE
+    assert job.completed_at is not None
+    output = io.StringIO()
+    batch_jobs.write_results(job, output)
+    assert output.getvalue() == bulk_results(client, input_lines)
+
+
+@pytest.mark.django_db
+def test_lines_are_only_split_on_newlines(
+        client, tmp_path, input_lines):  # noqa: F811
+    # JSON strings may hold line separators other than newlines
+    record = json.loads(input_lines[0])
+    record["note"] = "\u2028\u2029\x85\x0b\x0c"
+    input_lines = [json.dumps(record, ensure_ascii=False)] + input_lines
+    path = tmp_path / "applications.jsonl"
+    path.write_text("\n".join(input_lines) + "\n", encoding="utf-8")
+    job = batch_jobs.create_job(str(path), chunk_size=4)
+
+    batch_jobs.work(job, "worker")
+
+    output = io.StringIO()
+    batch_jobs.write_results(job, output)
+    assert output.getvalue() == bulk_results(client, input_lines)
+
+
+@pytest.mark.django_db
+def test_killed_job_resumes(client, input_path, input_lines):  # noqa: F811
+    job = batch_jobs.create_job(str(input_path), chunk_size=4)
+
+    # One chunk completes, then the worker dies holding a claim
+    chunk = batch_jobs.claim_chunk(job, "killed")
+    assert batch_jobs.complete_chunk(
+        chunk, "killed", batch_jobs.evaluate_chunk(job, chunk))
+    stuck = batch_jobs.claim_chunk(job, "killed")
+    job.refresh_from_db()
+    assert job.status == BatchJob.RUNNING
+
+    # A recent claim is left to its worker
+    assert batch_jobs.work(job, "resumed") == 4
+    job.refresh_from_db()
+    assert job.status == BatchJob.RUNNING
+
+    # A stale one is claimed again, and the late worker's results dropped
+    BatchChunk.objects.filter(pk=stuck.pk).update(
+        claimed_at=timezone.now() - timedelta(seconds=601))
+    assert batch_jobs.work(job, "resumed") == 1
+    assert not batch_jobs.complete_chunk(stuck, "killed", "late")
+
+    job.refresh_from_db()
+    assert job.status == BatchJob.COMPLETE
+    assert set(job.chunks.values_list('claimed_by', flat=True)) == {
+        "killed", "resumed"}
+    output = io.StringIO()
+    batch_jobs.write_results(job, output)
+    assert output.getvalue() == bulk_results(client, input_lines)
+
+
+@pytest.mark.django_db
+def test_commands(client, input_path, input_lines, tmp_path):  # noqa: F811
+    stdout = io.StringIO()
+    call_command("create_batch_job", str(input_path), chunk_size=5,
+                 mode="first_failure", stdout=stdout)
+    job_id = int(stdout.getvalue())
+
+    with pytest.raises(CommandError):
+        call_command("export_batch_job", job_id)
+
+    stderr = io.StringIO()
+    call_command("run_batch_job", job_id, stderr=stderr)
+    assert f"Completed 5 chunks; job {job_id} is complete" in \
+        stderr.getvalue()
+
+    output = tmp_path / "results.jsonl"
+    call_command("export_batch_job", job_id, output=str(output))
+    assert output.read_text() == bulk_results(
+        client, input_lines, "first_failure")
+
+
+@pytest.mark.django_db
+def test_command_errors(tmp_path):
+    with pytest.raises(CommandError):
+        call_command("create_batch_job", str(tmp_path / "missing.jsonl"))
+    with pytest.raises(CommandError):
+        call_command("run_batch_job", 1)
+    with pytest.raises(CommandError):
+        call_command("export_batch_job", 1)
@@ -0,0 +1,333 @@
+"""
+Benchmarks for each stage of an eligibility determination. They are skipped
+unless BENCHMARK is set:
+
+    BENCHMARK=1 pytest --no-cov tests/test_benchmarks.py
+
+Each stage is timed over the application payloads in examples/*.json and
+tests/fixtures/applications.jsonl and compared with the baseline stored in
+BENCHMARK_BASELINE (tests/benchmark_baseline.json by default). A stage fails
+when it is slower than its baseline by more than the BENCHMARK_THRESHOLD
+ratio (2 by default, since timings of the same code vary by up to half
+between runs). The committed baseline is the median of three runs on a
+developer machine; run with BENCHMARK_SAVE=1 to store the timings of another
+machine, or of a deliberate change, as the new baseline.
+
+The active disaster query is timed over BENCHMARK_DISASTERS (20000 by
+default) seeded historical disasters. Its query plans and timings with and
+without its index, and the time taken by the active disaster registry, are
+written to the summary of the benchmarks along with every stage's timing.
+"""
+import copy
+import datetime
+import glob
+import json
+import os
+import random
+import timeit
+
+import pytest
+from django.db import connection
+
+from . import factories
+from .test_wsgi import keep_connections, wsgi_request  # noqa: F401
+from dsnap_rules import income_allotment_calculator, result_cache
+from dsnap_rules.active_disasters import ActiveDisasterRegistry
+from dsnap_rules.dsnap_application import DSNAPApplication
+from dsnap_rules.dsnap_rules import ELIGIBILITY_PLAN, ELIGIBILITY_RULES
+from dsnap_rules.models import ApplicationPeriod, Disaster, State
+from dsnap_rules.validate import validate
+from rules_service import wsgi
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("BENCHMARK"), reason="Set BENCHMARK=1 to run benchmarks")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.getenv(
+    "BENCHMARK_BASELINE",
+    os.path.join(ROOT, "tests", "benchmark_baseline.json"))
+APPLICATIONS_PATH = os.path.join(
+    ROOT, "tests", "fixtures", "applications.jsonl")
+THRESHOLD = float(os.getenv("BENCHMARK_THRESHOLD", 2))
+REPEAT = 5
+SCALE_DISASTERS = int(os.getenv("BENCHMARK_DISASTERS", 20000))
+
+RESULTS = {}
+# Lines added to the summary of the benchmarks
+NOTES = []
+
+
+def load_payloads():
+    """
+    Load the application payloads from the examples and from the sample
+    applications, one per line, in APPLICATIONS_PATH.
+    """
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "examples", "*.json"))):
+        with open(path) as f:
+            payloads.append(json.load(f))
+
+    with open(APPLICATIONS_PATH) as f:
+        payloads.extend(json.loads(line) for line in f if line.strip())
+    return payloads
+
+
+PAYLOADS = load_payloads()
+VALID_PAYLOADS = [payload for payload in PAYLOADS if validate(payload)[0]]
+APPLICATIONS = [DSNAPApplication(payload) for payload in VALID_PAYLOADS]
+DISASTER = Disaster(
+    state=State(abbreviation="FL", name="Florida"),
+    residency_required=True,
+    uses_DSED=False,
+    allows_food_loss_alone=True,
+)
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+BASELINE = load_baseline()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def save_baseline(benchmark_report):
+    yield
+    benchmark_report.extend(summarize())
+    if os.getenv("BENCHMARK_SAVE") and RESULTS:
+        baseline = load_baseline()
+        baseline.update(RESULTS)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+def summarize():
+    """Yield the timings, against their baselines, and the notes."""
+    for stage, seconds in sorted(RESULTS.items()):
+        baseline = BASELINE.get(stage)
+        compared = (f" ({seconds / baseline:.2f}x baseline)"
+                    if baseline else "")
+        yield f"{stage}: {seconds * 1e6:.1f}us{compared}"
+    yield from NOTES
+
+
+def report(line):
+    NOTES.append(line)
+
+
+def measure(func):
+    """Return the best time in seconds of a single call of `func`."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=REPEAT, number=number)) / number
+
+
+def check(stage, seconds):
+    RESULTS[stage] = seconds
+    baseline = BASELINE.get(stage)
+    if baseline is not None and seconds > baseline * THRESHOLD:
+        pytest.fail(
+            f"{stage} took {seconds * 1e6:.1f}us, more than {THRESHOLD} "
+            f"times the baseline of {baseline * 1e6:.1f}us")
+
+
+def run_rule(rule):
+    def run():
+        for application in APPLICATIONS:
+            rule.execute(application, DISASTER)
+    return run
+
+
+def get_calculators():
+    for application in APPLICATIONS:
+        income_allotment_calculator.get_calculator(
+            DISASTER, application.region_category).get_limit_and_allotment(
+                application.size_of_household)
+
+
+STAGES = {
+    "validate": lambda: [validate(payload) for payload in PAYLOADS],
+    "application": lambda: [
+        DSNAPApplication(payload) for payload in VALID_PAYLOADS],
+    "calculator": get_calculators,
+    "rules.And": run_rule(ELIGIBILITY_RULES),
+    "plan": run_rule(ELIGIBILITY_PLAN),
+}
+STAGES.update({
+    f"rule.{rule.__class__.__name__}": run_rule(rule)
+    for rule in ELIGIBILITY_RULES.rules
+})
+
+
+@pytest.mark.parametrize("stage", sorted(STAGES))
+def test_stage(stage):
+    check(stage, measure(STAGES[stage]))
+
+
+@pytest.fixture
+def no_result_cache(settings):
+    """
+    Disable the result cache, so that repeated payloads time determinations
+    rather than cache hits.
+    """
+    settings.RESULT_CACHE_MAX_BYTES = 0
+    result_cache.results.invalidate()
+    hits = result_cache.results.hits
+    yield
+    assert result_cache.results.hits == hits
+
+
+@pytest.mark.django_db
+def test_views_index(client, no_result_cache):
+    disaster = factories.DisasterFactory(
+        state=State.objects.get(abbreviation="FL"))
+    payloads = []
+    for payload in VALID_PAYLOADS:
+        payload = copy.deepcopy(payload)
+        payload["disaster_id"] = disaster.id
+        payloads.append(payload)
+
+    def post():
+        for payload in payloads:
+            client.post('/', data=payload, content_type="application/json")
+
+    check("views.index", measure(post))
+
+
+@pytest.mark.django_db
+def test_wsgi_routes(keep_connections, no_result_cache):  # noqa: F811
+    disaster = factories.DisasterFactory(
+        state=State.objects.get(abbreviation="FL"))
+    payloads = []
+    for payload in VALID_PAYLOADS:
+        payload = copy.deepcopy(payload)
+        payload["disaster_id"] = disaster.id
+        payloads.append(payload)
+
+    def post(path):
+        def run():
+            for payload in payloads:
+                wsgi_request(wsgi.application, path, payload)
+        return run
+
+    index = measure(post('/'))
+    eligibility = measure(post('/eligibility'))
+    report(f"/eligibility took {(1 - eligibility / index) * 100:.0f}% less "
+           f"time than / (DRF)")
+    check("wsgi.index", index)
+    check("wsgi.eligibility", eligibility)
+
+
+def seed_disasters(today, count):
+    """
+    Seed `count` disasters over the ten years before `today`, each with two
+    application periods, of which only the most recent few span `today`.
+    """
+    states = list(State.objects.all())
+    rng = random.Random(0)
+    Disaster.objects.bulk_create(
+        Disaster(
+            disaster_request_no=f"DR-{i}",
+            title=f"Disaster {i}",
+            description="",
+            benefit_begin_date=today,
+            benefit_end_date=today,
+            state=rng.choice(states),
+            residency_required=True,
+            uses_DSED=False,
+            allows_food_loss_alone=True,
+        ) for i in range(count))
+
+    periods = []
+    for i, disaster_id in enumerate(Disaster.objects.order_by(
+            'id').values_list('id', flat=True)):
+        begin = today - datetime.timedelta(
+            days=3650 * (count - i) // count + 1)
+        for days in (0, 14):
+            registration_begin = begin + datetime.timedelta(days=days)
+            periods.append(ApplicationPeriod(
+                disaster_id=disaster_id,
+                begin_date=registration_begin,
+                end_date=registration_begin + datetime.timedelta(days=30),
+                registration_begin_date=registration_begin,
+                registration_end_date=(
+                    registration_begin + datetime.timedelta(days=7)),
+            ))
+    ApplicationPeriod.objects.bulk_create(periods, batch_size=5000)
+
+
+def active_disasters_queryset(today):
+    """
+    Return the disasters with an application period whose registration period
+    spans `today`, from the database rather than the active disaster
+    registry. Both conditions are in one `filter` so that they apply to the
+    same period, through a single join that the `app_period_active_idx` index
+    covers.
+    """
+    return Disaster.objects.filter(
+        application_periods__registration_begin_date__lte=today,
+        application_periods__registration_end_date__gte=today).distinct()
+
+
+def explain(queryset, label):
+    """
+    Return the query plan of the queryset. The label makes the statement
+    unique, since SQLite reuses the plans of cached EXPLAIN statements after
+    an index is dropped.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"{connection.ops.explain_query_prefix()} {sql} /* {label} */",
+            params)
+        return "\n".join(
+            " ".join(str(column) for column in row)
+            for row in cursor.fetchall())
+
+
+@pytest.mark.django_db
+def test_active_disasters_at_scale():
+    """
+    Time the active disaster query over years of historical disasters, with
+    and without the app_period_active_idx index.
+    """
+    today = datetime.date.today()
+    seed_disasters(today, SCALE_DISASTERS)
+    queryset = active_disasters_queryset(today)
+    index = ApplicationPeriod._meta.indexes[0]
+    columns = ", ".join(
+        ApplicationPeriod._meta.get_field(name).column
+        for name in index.fields)
+
+    def query():
+        return list(queryset.all())
+
+    active = len(query())
+    indexed = measure(query)
+    indexed_plan = explain(queryset, "indexed")
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP INDEX {index.name}")
+        try:
+            unindexed = measure(query)
+            unindexed_plan = explain(queryset, "unindexed")
+        finally:
+            cursor.execute(
+                f"CREATE INDEX {index.name} "
+                f"ON {ApplicationPeriod._meta.db_table} ({columns})")
+
+    registry = ActiveDisasterRegistry()
+    assert registry.disaster_ids(today) == {d.id for d in query()}
+    from_registry = measure(lambda: registry.disaster_ids(today))
+
+    report(f"{SCALE_DISASTERS} disasters, {active} active")
+    report(f"Without {index.name}: {unindexed * 1e3:.2f}ms\n"
+           f"{unindexed_plan}")
+    report(f"With {index.name}: {indexed * 1e3:.2f}ms\n{indexed_plan}")
+    report(f"From the active disaster registry: "
+           f"{from_registry * 1e6:.1f}us")
+    check("disasters.active", indexed)
+    check("disasters.registry", from_registry)
@@ -0,0 +1,190 @@
+import threading
+import time
+
+import pytest
+
+from dsnap_rules import connection_pool, metrics
+from dsnap_rules.connection_pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+class Connector:
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        connection = FakeConnection(len(self.connections))
+        self.connections.append(connection)
+        return connection
+
+
+def check(connection):
+    if not connection.healthy:
+        raise OSError("server closed the connection unexpectedly")
+    return True
+
+
+@pytest.fixture
+def connect():
+    return Connector()
+
+
+def test_connections_are_reused(connect):
+    pool = ConnectionPool(connect, max_size=2)
+    first = pool.get()
+    pool.put(first)
+    assert pool.get() is first
+    second = pool.get()
+    assert second is not first
+    pool.put(first)
+    pool.put(second)
+
+    # The most recently given back connection is handed out first
+    assert pool.get() is second
+    assert len(connect.connections) == 2
+    assert pool.stats() == {
+        "size": 2, "idle": 1, "in_use": 1, "waiting": 0, "created": 2,
+        "timeouts": 0,
+    }
+
+
+def test_full_pool_times_out(connect):
+    pool = ConnectionPool(connect, max_size=1, timeout=0.05)
+    pool.get()
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.get()
+    assert time.monotonic() - started >= 0.05
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_waiters_get_connections_given_back(connect):
+    pool = ConnectionPool(connect, max_size=1, timeout=5)
+    connection = pool.get()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.get()))
+    waiter.start()
+    while pool.stats()["waiting"] == 0:
+        time.sleep(0.001)
+    pool.put(connection)
+    waiter.join()
+    assert got == [connection]
+    assert len(connect.connections) == 1
+
+
+def test_concurrent_users_share_the_pool(connect):
+    pool = ConnectionPool(connect, max_size=3, timeout=5)
+    in_use = set()
+    most = []
+    lock = threading.Lock()
+
+    def use():
+        for _ in range(20):
+            connection = pool.get()
+            with lock:
+                assert connection not in in_use
+                in_use.add(connection)
+                most.append(len(in_use))
+            time.sleep(0.0005)
+            with lock:
+                in_use.remove(connection)
+            pool.put(connection)
+
+    threads = [threading.Thread(target=use) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(most) <= 3
+    assert len(connect.connections) <= 3
+    assert pool.stats()["in_use"] == 0
+
+
+def test_idle_connections_are_checked(connect):
+    pool = ConnectionPool(connect, check=check, check_after=0)
+    connection = pool.get()
+    pool.put(connection)
+    assert pool.get() is connection
+
+    connection.healthy = False
+    pool.put(connection)
+    replacement = pool.get()
+    assert replacement is not connection
+    assert connection.closed
+    assert pool.stats()["size"] == 1
+
+
+def test_recently_used_connections_are_not_checked(connect):
+    pool = ConnectionPool(connect, check=check, check_after=60)
+    connection = pool.get()
+    connection.healthy = False
+    pool.put(connection)
+    assert pool.get() is connection
+
+
+def test_connections_which_cannot_be_reset_are_discarded(connect):
+    def reset(connection):
+        if connection.closed:
+            raise OSError("connection already closed")
+
+    pool = ConnectionPool(connect, max_size=1, reset=reset)
+    connection = pool.get()
+    connection.closed = True
+    pool.put(connection)
+    assert pool.stats()["size"] == 0
+    assert pool.get() is not connection
+
+    other = connect()
+    pool.put(other, discard=True)
+    assert other.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_failed_connects_give_up_their_place(connect):
+    def fail():
+        raise OSError("could not connect to server")
+
+    pool = ConnectionPool(fail, max_size=1)
+    with pytest.raises(OSError):
+        pool.get()
+    assert pool.stats()["size"] == 0
+    assert pool.get(connect) is connect.connections[0]
+
+
+def test_close_closes_idle_connections(connect):
+    pool = ConnectionPool(connect)
+    idle = pool.get()
+    in_use = pool.get()
+    pool.put(idle)
+    pool.close()
+    assert idle.closed and not in_use.closed
+    assert pool.stats()["size"] == 1
+
+
+def test_pool_metrics(connect, monkeypatch):
+    pool = ConnectionPool(connect, max_size=2)
+    monkeypatch.setattr(
+        connection_pool, "pools", {("default", "", "", "dsnap", ""): pool})
+    pool.put(pool.get())
+    pool.get()
+    pool.get()
+
+    registry = metrics.Registry()
+    registry.collectors.append(metrics.collect_connection_pools)
+    text = registry.collect().exposition()
+    assert "# TYPE dsnap_db_pool_connections gauge" in text
+    assert ('dsnap_db_pool_connections{database="default",state="in_use"} '
+            '2.0') in text
+    assert ('dsnap_db_pool_connections{database="default",state="idle"} '
+            '0.0') in text
+    assert 'dsnap_db_pool_waiting{database="default"} 0.0' in text
+    assert 'dsnap_db_pool_created_total{database="default"} 2.0' in text
@@ -0,0 +1,59 @@
+import copy
+
+import pytest
+
+from . import factories
+from .test_api import GOOD_PAYLOAD
+from dsnap_rules import reference_data
+from dsnap_rules.disaster_cache import DisasterCache, disasters
+from dsnap_rules.models import Disaster
+
+
+@pytest.mark.django_db
+def test_steady_state_eligibility_makes_no_queries(
+        client, django_assert_num_queries, settings):
+    # Without replicas, which check for recent changes before loading
+    settings.REPLICA_DATABASES = []
+    disaster = factories.DisasterFactory()
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    payload["disaster_id"] = disaster.id
+
+    # The reference data version, then the snapshot
+    with django_assert_num_queries(5):
+        client.post('/', data=payload, content_type="application/json")
+    with django_assert_num_queries(0):
+        response = client.post('/', data=payload,
+                               content_type="application/json")
+    assert response.json()["state"] == disaster.state.abbreviation
+
+
+@pytest.mark.django_db
+def test_saving_a_disaster_invalidates_it():
+    disaster = factories.DisasterFactory(uses_DSED=False)
+    assert disasters.get(disaster.id).uses_DSED is False
+
+    disaster.uses_DSED = True
+    disaster.save()
+    assert disasters.get(disaster.id).uses_DSED is True
+
+    disaster.delete()
+    with pytest.raises(Disaster.DoesNotExist):
+        disasters.get(disaster.id)
+
+
+@pytest.mark.django_db
+def test_disasters_are_reloaded_when_the_version_changes(
+        django_assert_num_queries):
+    disaster = factories.DisasterFactory()
+    cache = DisasterCache()
+    loaded = cache.get(disaster.id)
+    version = cache.version(disaster.id)
+    with django_assert_num_queries(0):
+        assert cache.get(disaster.id) is loaded
+
+    # Changed in another process, which cannot signal this one
+    Disaster.objects.filter(pk=disaster.id).update(title="Renamed")
+    reference_data.bump_version()
+    assert cache.version(disaster.id) is None
+    assert cache.get(disaster.id).title == "Renamed"
+    assert cache.version(disaster.id) > version
@@ -7,10 +7,17 @@ from dsnap_rules.dsnap_rules import (
     AdverseEffectRule,
     AuthorizedRule,
     DisasterAreaResidencyRule,
+    FoodPurchaseRule,
     IncomeAndResourceRule,
 )
 from dsnap_rules.models import Disaster
-from dsnap_rules.rules import And, Result
+from dsnap_rules.rules import (
+    ALL_FINDINGS,
+    FIRST_FAILURE,
+    SUCCESS_OR_FIRST_FAILURE,
+    And,
+    Result,
+)
 
 
 @pytest.mark.parametrize(
@@ -249,8 +256,8 @@ def test_income_and_resource_rule(
         income, allows_food_loss_alone, food_loss, non_food_loss, limit,
         successful, finding_text):
     ALLOTMENT = 100
-    get_calculator_mock.return_value.get_limit.return_value = limit
-    get_calculator_mock.return_value.get_allotment.return_value = ALLOTMENT
+    get_calculator_mock.return_value.get_limit_and_allotment.return_value = (
+        limit, ALLOTMENT)
 
     payload = {
         "total_take_home_income": income,
@@ -273,8 +280,8 @@ def test_income_and_resource_rule(
 def test_DSED_calculation(get_calculator_mock):
     LIMIT = 500
     ALLOTMENT = 100
-    get_calculator_mock.return_value.get_limit.return_value = LIMIT
-    get_calculator_mock.return_value.get_allotment.return_value = ALLOTMENT
+    get_calculator_mock.return_value.get_limit_and_allotment.return_value = (
+        LIMIT, ALLOTMENT)
 
     TOTAL_TAKE_HOME_INCOME = 100
     ACCESSIBLE_LIQUID_RESOURCES = 450
@@ -307,6 +314,118 @@ def test_DSED_calculation(get_calculator_mock):
     )
 
 
+@pytest.mark.parametrize(
+    "is_head_of_household, has_inaccessible_liquid_resources, "
+    "purchased_or_plans_to_purchase_food",
+    [
+        (True, True, True),
+        (True, False, True),
+        (False, True, False),
+        (False, False, False),
+    ])
+def test_compiled_plan_matches_rule_tree(
+        is_head_of_household, has_inaccessible_liquid_resources,
+        purchased_or_plans_to_purchase_food):
+    payload = {
+        "is_head_of_household": is_head_of_household,
+        "is_authorized_representative": False,
+        "has_lost_or_inaccessible_income": False,
+        "has_inaccessible_liquid_resources": has_inaccessible_liquid_resources,
+        "purchased_or_plans_to_purchase_food":
+            purchased_or_plans_to_purchase_food,
+        "resided_in_disaster_area_at_disaster_time": False,
+        "worked_in_disaster_area_at_disaster_time": True,
+        "disaster_expenses": {}
+    }
+    application = DSNAPApplication(payload)
+    disaster = Disaster(residency_required=False, uses_DSED=False,
+                        allows_food_loss_alone=True)
+    rule = And(
+        AuthorizedRule(),
+        And(AdverseEffectRule(), FoodPurchaseRule()),
+        DisasterAreaResidencyRule()
+    )
+    plan = rule.compile()
+
+    assert len(plan) == 4
+    expected = rule.execute(application, disaster)
+    actual = plan.execute(application, disaster)
+    assert actual == expected
+    assert actual.findings == expected.findings
+
+
+def test_compiled_plan_is_immutable():
+    plan = And(AuthorizedRule()).compile()
+    with pytest.raises(AttributeError):
+        plan.steps = ()
+
+
+@pytest.mark.parametrize(
+    "mode, successful, rules",
+    [
+        (ALL_FINDINGS, False,
+            ["AuthorizedRule", "AdverseEffectRule", "FoodPurchaseRule"]),
+        (FIRST_FAILURE, False, ["AuthorizedRule", "AdverseEffectRule"]),
+        (SUCCESS_OR_FIRST_FAILURE, False, ["AdverseEffectRule"]),
+    ])
+def test_evaluation_modes(mode, successful, rules):
+    payload = {
+        "is_head_of_household": True,
+        "has_lost_or_inaccessible_income": False,
+        "has_inaccessible_liquid_resources": False,
+        "purchased_or_plans_to_purchase_food": True,
+        "disaster_expenses": {}
+    }
+    application = DSNAPApplication(payload)
+    disaster = Disaster(uses_DSED=True)
+    rule = And(AuthorizedRule(), AdverseEffectRule(), FoodPurchaseRule(),
+               mode=mode)
+
+    for result in (rule.execute(application, disaster),
+                   rule.compile().execute(application, disaster),
+                   And(AuthorizedRule(), AdverseEffectRule(),
+                       FoodPurchaseRule()).compile().execute(
+                           application, disaster, mode)):
+        assert result.successful is successful
+        assert [f["rule"] for f in result.findings] == rules
+
+
+@pytest.mark.parametrize(
+    "mode", [ALL_FINDINGS, FIRST_FAILURE, SUCCESS_OR_FIRST_FAILURE])
+def test_evaluation_modes_on_success(mode):
+    payload = {
+        "is_head_of_household": True,
+        "purchased_or_plans_to_purchase_food": True,
+    }
+    application = DSNAPApplication(payload)
+    result = And(AuthorizedRule(), FoodPurchaseRule()).compile().execute(
+        application, Disaster(), mode)
+    assert result.successful is True
+    assert [f["rule"] for f in result.findings] == [
+        "AuthorizedRule", "FoodPurchaseRule"]
+
+
+def test_unknown_evaluation_mode():
+    with pytest.raises(ValueError):
+        And(AuthorizedRule(), mode="some_findings")
+
+
+def test_application_precomputes_disaster_expenses():
+    application = DSNAPApplication({
+        "disaster_expenses": {
+            "food_loss": 25,
+            "home_or_business_repairs": 100,
+            "other": 10,
+        }
+    })
+    assert application.food_loss == 25
+    assert application.disaster_expenses_with_food_loss == 135
+    assert application.disaster_expenses_without_food_loss == 110
+    assert application.deductible_disaster_expenses(True) == 135
+    assert application.deductible_disaster_expenses(False) == 110
+    assert not hasattr(application, "__dict__")
+
+
 def assert_result(rule, application, expected_result, disaster=None):
     if disaster is None:
         disaster = Disaster()
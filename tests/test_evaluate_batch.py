@@ -0,0 +1,113 @@
+import copy
+import io
+import json
+import multiprocessing
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from . import factories
+from .test_api import GOOD_PAYLOAD
+from .test_connection_pool import Connector
+from dsnap_rules import connection_pool
+from dsnap_rules.connection_pool import ConnectionPool
+from dsnap_rules.models import State
+
+
+@pytest.fixture
+def input_lines():
+    disaster = factories.DisasterFactory(
+        state=State.objects.get(abbreviation="FL"))
+    eligible = copy.deepcopy(GOOD_PAYLOAD)
+    eligible["disaster_id"] = disaster.id
+    ineligible = copy.deepcopy(eligible)
+    ineligible["total_take_home_income"] = 100000
+    invalid = copy.deepcopy(eligible)
+    del invalid["is_head_of_household"]
+    missing_disaster = copy.deepcopy(eligible)
+    missing_disaster["disaster_id"] = disaster.id + 1
+
+    payloads = [eligible, ineligible, invalid, missing_disaster] * 5
+    lines = [json.dumps(payload) for payload in payloads]
+    lines[3:3] = ["", "{not json"]
+    return lines
+
+
+def bulk_results(client, lines, mode="all_findings"):
+    response = client.post(f'/bulk?mode={mode}', data="\n".join(lines),
+                           content_type="application/x-ndjson")
+    return b"".join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("workers", [0, 2])
+def test_results_match_bulk_endpoint(client, tmp_path, input_lines, workers):
+    path = tmp_path / "applications.jsonl"
+    path.write_text("\n".join(input_lines) + "\n")
+    output = tmp_path / "results.jsonl"
+    stderr = io.StringIO()
+
+    call_command("evaluate_batch", str(path), output=str(output),
+                 workers=workers, chunk_size=3, stderr=stderr)
+
+    results = output.read_text()
+    assert results == bulk_results(client, input_lines)
+    assert [json.loads(line)["status"] for line in results.splitlines()][:5] \
+        == [200, 200, 400, 400, 404]
+    assert "Evaluated 21 applications" in stderr.getvalue()
+
+
+@pytest.mark.django_db
+def test_workers_are_forked_when_spawn_is_the_default(
+        client, tmp_path, input_lines):
+    path = tmp_path / "applications.jsonl"
+    path.write_text("\n".join(input_lines) + "\n")
+    output = tmp_path / "results.jsonl"
+    start_method = multiprocessing.get_start_method()
+    multiprocessing.set_start_method("spawn", force=True)
+    try:
+        call_command("evaluate_batch", str(path), output=str(output),
+                     workers=2, chunk_size=3, stderr=io.StringIO())
+    finally:
+        multiprocessing.set_start_method(start_method, force=True)
+
+    assert output.read_text() == bulk_results(client, input_lines)
+
+
+@pytest.mark.django_db
+def test_workers_do_not_inherit_pooled_connections(
+        tmp_path, input_lines, monkeypatch):
+    path = tmp_path / "applications.jsonl"
+    path.write_text("\n".join(input_lines) + "\n")
+    pool = ConnectionPool(Connector())
+    idle = pool.get()
+    pool.put(idle)
+    monkeypatch.setattr(
+        connection_pool, "pools", {("default", "", "", "dsnap", ""): pool})
+
+    call_command("evaluate_batch", str(path), output=str(tmp_path / "out"),
+                 workers=2, chunk_size=3, stderr=io.StringIO())
+
+    assert idle.closed
+    assert pool.stats()["idle"] == 0
+
+
+@pytest.mark.django_db
+def test_writes_to_stdout(client, tmp_path, input_lines):
+    path = tmp_path / "applications.jsonl"
+    path.write_text("\n".join(input_lines))
+    stdout = io.StringIO()
+
+    call_command("evaluate_batch", str(path), workers=0, mode="first_failure",
+                 stdout=stdout, stderr=io.StringIO())
+
+    assert stdout.getvalue() == bulk_results(
+        client, input_lines, "first_failure")
+
+
+def test_errors(tmp_path):
+    with pytest.raises(CommandError):
+        call_command("evaluate_batch", str(tmp_path / "missing.jsonl"),
+                     workers=0)
+    with pytest.raises(CommandError):
+        call_command("evaluate_batch", "-", chunk_size=0)
@@ -1,7 +1,21 @@
+import json
+from unittest.mock import patch
+
 import pytest
 
-from dsnap_rules.income_allotment_calculator import \
-    IncomeAndAllotmentCalculator
+from dsnap_rules import income_allotment_calculator
+from dsnap_rules.income_allotment_calculator import (
+    AK_RURAL2_Calculator,
+    AK_URBAN_Calculator,
+    CalculatorNotFound,
+    DEFAULT_Calculator,
+    DSED_Calculator,
+    HI_Calculator,
+    IncomeAndAllotmentCalculator,
+    get_calculator,
+    load_calculators,
+)
+from dsnap_rules.models import Disaster, State
 
 
 def test_non_ascending_limits():
@@ -48,3 +62,69 @@ def test_allotment_calculations():
     assert calculator.get_allotment(2) == 6
     assert calculator.get_allotment(3) == 8
     assert calculator.get_allotment(5) == 8 + 2 * 6
+
+
+@pytest.mark.parametrize("max_household_size", [1, 3, 6])
+def test_tables_match_extrapolation(max_household_size):
+    calculator = IncomeAndAllotmentCalculator([
+            (10, 4),
+            (20, 6),
+            (30, 8),
+        ],
+        8, 6, max_household_size=max_household_size)
+    for size in range(1, 12):
+        assert calculator.get_limit_and_allotment(size) == (
+            calculator.extrapolate_limit(size),
+            calculator.extrapolate_allotment(size))
+
+
+def test_vectorized_limits_and_allotments():
+    calculator = IncomeAndAllotmentCalculator([
+            (10, 4),
+            (20, 6),
+            (30, 8),
+        ],
+        8, 6, max_household_size=4)
+    sizes = [1, 2, 3, 4, 5, 9]
+    limits, allotments = calculator.get_limits_and_allotments(sizes)
+    assert limits.tolist() == [calculator.get_limit(s) for s in sizes]
+    assert allotments.tolist() == [calculator.get_allotment(s) for s in sizes]
+
+
+@pytest.mark.parametrize(
+    "uses_DSED, state, region_category, calculator",
+    [
+        (False, "FL", None, DEFAULT_Calculator),
+        (False, "HI", None, HI_Calculator),
+        (False, "AK", "URBAN", AK_URBAN_Calculator),
+        (False, "AK", "RURAL2", AK_RURAL2_Calculator),
+        (True, "HI", None, DSED_Calculator),
+        (True, "AK", None, DSED_Calculator),
+    ])
+def test_get_calculator(uses_DSED, state, region_category, calculator):
+    disaster = Disaster(uses_DSED=uses_DSED, state=State(abbreviation=state))
+    assert get_calculator(disaster, region_category) is calculator
+
+
+@pytest.mark.parametrize("region_category", [None, "SUBURBAN"])
+def test_alaska_requires_region_category(region_category):
+    disaster = Disaster(uses_DSED=False, state=State(abbreviation="AK"))
+    with pytest.raises(CalculatorNotFound):
+        get_calculator(disaster, region_category)
+
+
+def test_load_calculators(tmp_path):
+    path = tmp_path / "calculators.json"
+    path.write_text(json.dumps([{
+        "state": "AS",
+        "limits_and_allotments": [[10, 4], [20, 6]],
+        "incremental_limit": 8,
+        "incremental_allotment": 6,
+    }]))
+    disaster = Disaster(uses_DSED=False, state=State(abbreviation="AS"))
+
+    with patch.dict(income_allotment_calculator.CALCULATORS):
+        load_calculators(str(path))
+        calculator = get_calculator(disaster)
+        assert calculator.get_limit_and_allotment(3) == (28, 12)
+    assert get_calculator(disaster) is DEFAULT_Calculator
@@ -0,0 +1,132 @@
+import copy
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from . import factories
+from .test_api import GOOD_PAYLOAD
+from dsnap_rules import eligibility, metrics, rules
+from dsnap_rules.dsnap_rules import ELIGIBILITY_PLAN, ELIGIBILITY_RULES
+from dsnap_rules.models import State
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    """Enable metrics, with a plan compiled while the rule hook is added."""
+    registry = metrics.Registry(str(tmp_path), flush_interval=0)
+    registry.collectors.append(metrics.collect_result_cache)
+    monkeypatch.setattr(metrics, "registry", registry)
+    rules.add_step_hook(metrics.rule_hook)
+    try:
+        monkeypatch.setattr(
+            eligibility, "ELIGIBILITY_PLAN", ELIGIBILITY_RULES.compile())
+    finally:
+        rules.remove_step_hook(metrics.rule_hook)
+    return registry
+
+
+@pytest.fixture
+def payload():
+    disaster = factories.DisasterFactory(
+        state=State.objects.get(abbreviation="FL"))
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    payload["disaster_id"] = disaster.id
+    return payload
+
+
+def test_disabled_by_default(client):
+    assert metrics.registry is None
+    assert rules.STEP_HOOKS == []
+    assert metrics.stage_clock() is metrics.NULL_CLOCK
+    # The plan runs the rules' own steps
+    assert all(step.__name__ == "step" for step in ELIGIBILITY_PLAN._steps)
+    assert client.get('/metrics').status_code == 404
+
+
+@pytest.mark.django_db
+def test_rule_and_stage_metrics(client, registry, payload):
+    client.post('/', data=payload, content_type="application/json")
+    client.post('/', data=payload, content_type="application/json")
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = response.content.decode()
+
+    for rule in ELIGIBILITY_RULES.rules:
+        name = rule.__class__.__name__
+        assert (f'dsnap_rule_duration_seconds_count{{rule="{name}"}} 1'
+                in text)
+    assert ('dsnap_rule_results_total{rule="AuthorizedRule",'
+            'outcome="success"} 1.0') in text
+    for stage in ("validate", "disaster", "evaluate", "render"):
+        assert (f'dsnap_stage_duration_seconds_count{{stage="{stage}"}} 1'
+                in text)
+    assert 'dsnap_result_cache_total{event="hits"} ' in text
+    assert "# TYPE dsnap_rule_duration_seconds histogram" in text
+    assert ('dsnap_stage_duration_seconds_bucket{stage="render",le="+Inf"} 1'
+            in text)
+
+
+@pytest.mark.django_db
+def test_metrics_are_aggregated_across_processes(
+        client, registry, payload, tmp_path):
+    other = metrics.Registry()
+    other.inc("dsnap_rule_results_total",
+              (("rule", "AuthorizedRule"), ("outcome", "failure")), 2)
+    other.observe("dsnap_stage_duration_seconds",
+                  (("stage", "validate"),), 2.0)
+    other_path = tmp_path / f"metrics-{os.getppid()}.json"
+    other_path.write_text(json.dumps(other.snapshot()))
+
+    client.post('/', data=payload, content_type="application/json")
+    text = client.get('/metrics').content.decode()
+
+    assert ('dsnap_rule_results_total{rule="AuthorizedRule",'
+            'outcome="failure"} 2' in text)
+    assert 'dsnap_stage_duration_seconds_count{stage="validate"} 2' in text
+    assert ('dsnap_stage_duration_seconds_bucket{stage="validate",le="1.0"} 1'
+            in text)
+    assert other_path.exists()
+
+
+@pytest.mark.django_db
+def test_metrics_of_exited_processes_are_dropped(registry, tmp_path):
+    exited = subprocess.Popen([sys.executable, "-c", ""])
+    exited.wait()
+    other = metrics.Registry()
+    other.inc("dsnap_rule_results_total",
+              (("rule", "AuthorizedRule"), ("outcome", "failure")), 2)
+    other.gauges[("dsnap_db_pool_waiting", (("database", "default"),))] = 3
+    stale_path = tmp_path / f"metrics-{exited.pid}.json"
+    stale_path.write_text(json.dumps(other.snapshot()))
+
+    text = registry.collect().exposition()
+    assert "dsnap_rule_results_total" not in text
+    assert "dsnap_db_pool_waiting" not in text
+    assert not stale_path.exists()
+    assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
+
+
+def test_histogram_buckets():
+    registry = metrics.Registry()
+    for seconds in (0.00001, 0.003, 5):
+        registry.observe("dsnap_stage_duration_seconds",
+                         (("stage", "render"),), seconds)
+    lines = registry.exposition().splitlines()
+
+    def bucket(le):
+        prefix = ('dsnap_stage_duration_seconds_bucket'
+                  f'{{stage="render",le="{le}"}} ')
+        return next(int(line[len(prefix):])
+                    for line in lines if line.startswith(prefix))
+
+    assert bucket(1e-05) == 1
+    assert bucket(0.0025) == 1
+    assert bucket(0.005) == 2
+    assert bucket(1.0) == 2
+    assert bucket("+Inf") == 3
+    assert 'dsnap_stage_duration_seconds_count{stage="render"} 3' in lines
@@ -0,0 +1,61 @@
+import pytest
+from django.db import connection, transaction
+
+
+pytestmark = [
+    pytest.mark.skipif(
+        connection.settings_dict["ENGINE"] != "dsnap_rules.pooled_postgresql",
+        reason="Set DATABASE_URL to a PostgreSQL database to test the pool"),
+    # Outside of a test transaction, so that closing returns connections
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_connections_are_returned_to_the_pool():
+    connection.ensure_connection()
+    raw = connection.connection
+    pool = connection.pool
+    idle = pool.stats()["idle"]
+
+    connection.close()
+    assert not raw.closed
+    assert pool.stats()["idle"] == idle + 1
+
+    connection.ensure_connection()
+    assert connection.connection is raw
+    assert pool.stats()["idle"] == idle
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        assert cursor.fetchone() == (1,)
+
+
+def test_open_transactions_are_rolled_back_on_return():
+    connection.ensure_connection()
+    raw = connection.connection
+    transaction.set_autocommit(False)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO state (abbreviation, name) VALUES ('ZZ', 'Z')")
+    assert raw.get_transaction_status() != 0
+
+    connection.close()
+    assert raw.get_transaction_status() == 0
+
+    connection.ensure_connection()
+    assert connection.connection is raw
+    assert connection.get_autocommit()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM state WHERE abbreviation = 'ZZ'")
+        assert cursor.fetchone() == (0,)
+
+
+def test_connections_closed_in_an_atomic_block_are_discarded():
+    connection.ensure_connection()
+    pool = connection.pool
+    size = pool.stats()["size"]
+    with transaction.atomic():
+        raw = connection.connection
+        connection.close()
+    assert raw.closed
+    assert pool.stats()["size"] == size - 1
+    connection.close()
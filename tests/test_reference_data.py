@@ -0,0 +1,175 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from . import factories
+from dsnap_rules import reference_data, views
+from dsnap_rules.active_disasters import registry
+from dsnap_rules.models import County
+
+
+def active_disaster(counties=2):
+    today = timezone.localdate()
+    disaster = factories.DisasterFactory()
+    period = factories.ApplicationPeriodFactory(
+        disaster=disaster,
+        registration_begin_date=today - timedelta(days=1),
+        registration_end_date=today + timedelta(days=5),
+    )
+    for i in range(counties):
+        period.counties.add(County.objects.create(
+            name=f"{disaster.title} County {i}", state=disaster.state))
+    return disaster, period
+
+
+@pytest.mark.django_db
+def test_active_disasters_query_count_does_not_grow(
+        django_assert_num_queries):
+    for _ in range(3):
+        active_disaster()
+
+    # The reference data version, then the states, disasters, periods and
+    # counties in bulk
+    with django_assert_num_queries(5):
+        registry.disaster_ids()
+    with django_assert_num_queries(0):
+        data = reference_data.active_disasters()
+    assert len(data) == 3
+    assert all(len(d["application_periods"][0]["counties"]) == 2
+               for d in data)
+
+
+@pytest.mark.django_db
+def test_disasters_response_is_cached(client, django_assert_num_queries):
+    active_disaster()
+    first = client.get('/disasters')
+
+    with django_assert_num_queries(0):
+        second = client.get('/disasters')
+    assert second.status_code == 200
+    assert second.content == first.content
+
+
+@pytest.mark.django_db
+def test_cached_response_expires_with_the_version(client, settings):
+    settings.REFERENCE_DATA_TTL = 60
+    active_disaster()
+    with patch.object(reference_data.cache, "set") as cache_set:
+        client.get('/disasters')
+    timeouts = {key: timeout for (key, _, timeout), _ in
+                cache_set.call_args_list}
+    assert any(key.startswith("dsnap_rules:active-disasters:")
+               for key in timeouts)
+    assert set(timeouts.values()) == {60}
+
+
+@pytest.mark.django_db
+def test_cached_response_is_keyed_on_the_date(client):
+    disaster, _ = active_disaster()
+    client.get('/disasters')
+
+    tomorrow = timezone.localdate() + timedelta(days=6)
+    with pytest.MonkeyPatch.context() as m:
+        m.setattr(timezone, "localdate", lambda: tomorrow)
+        response = client.get('/disasters')
+    assert response.json() == []
+
+
+@pytest.mark.django_db
+def test_editing_reference_data_invalidates_the_cache(client):
+    disaster, period = active_disaster()
+    client.get('/disasters')
+
+    disaster.title = "Renamed"
+    disaster.save()
+    assert client.get('/disasters').json()[0]["title"] == "Renamed"
+
+    county = period.counties.first()
+    county.name = "Renamed County"
+    county.save()
+    counties = client.get('/disasters').json()[0][
+        "application_periods"][0]["counties"]
+    assert "Renamed County" in counties
+
+    period.counties.remove(county)
+    counties = client.get('/disasters').json()[0][
+        "application_periods"][0]["counties"]
+    assert "Renamed County" not in counties
+
+    period.delete()
+    assert client.get('/disasters').json() == []
+
+
+@pytest.mark.django_db
+def test_bump_version():
+    version = reference_data.version()
+    reference_data.bump_version()
+    assert reference_data.version() == version + 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", ['/disasters', '/'])
+def test_conditional_get(client, path):
+    active_disaster()
+    response = client.get(path)
+    assert response.status_code == 200
+    etag = response["ETag"]
+    last_modified = response["Last-Modified"]
+    assert "must-revalidate" in response["Cache-Control"]
+
+    with patch.object(views, "render") as render, \
+            patch.object(reference_data, "active_disasters") as serialize:
+        response = client.get(path, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        assert response.content == b""
+
+        response = client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+    render.assert_not_called()
+    serialize.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_edits_change_the_etag(client):
+    disaster, _ = active_disaster()
+    etags = {path: client.get(path)["ETag"] for path in ['/disasters', '/']}
+
+    disaster.title = "Renamed"
+    disaster.save()
+    for path, etag in etags.items():
+        response = client.get(path, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+
+def test_active_disasters_etag_changes_at_midnight():
+    reference = reference_data.ReferenceDataVersion(
+        version=3, updated_at=timezone.now() - timedelta(days=2))
+    with patch.object(reference_data, "current", return_value=reference):
+        today = reference_data.active_disasters_stamp()
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with patch.object(timezone, "localdate", return_value=tomorrow):
+            stamp = reference_data.active_disasters_stamp()
+    assert stamp.etag != today.etag
+    assert stamp.last_modified > today.last_modified > reference.updated_at
+
+
+@pytest.mark.django_db
+def test_active_periods_must_span_today(client):
+    today = timezone.localdate()
+    disaster = factories.DisasterFactory()
+    factories.ApplicationPeriodFactory(
+        disaster=disaster,
+        registration_begin_date=today - timedelta(days=10),
+        registration_end_date=today - timedelta(days=5),
+    )
+    factories.ApplicationPeriodFactory(
+        disaster=disaster,
+        registration_begin_date=today + timedelta(days=5),
+        registration_end_date=today + timedelta(days=10),
+    )
+
+    assert client.get('/disasters').json() == []
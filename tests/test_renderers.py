@@ -0,0 +1,76 @@
+import copy
+import json
+
+import pytest
+
+from . import factories
+from .test_api import GOOD_PAYLOAD
+from dsnap_rules.dsnap_rules import (
+    AuthorizedRule,
+    DisasterAreaResidencyRule,
+)
+from dsnap_rules.renderers import renderer
+
+BODIES = [
+    {
+        "eligible": False,
+        "findings": [
+            {
+                "rule": "AuthorizedRule",
+                "succeeded": False,
+                "text": AuthorizedRule.failure_finding
+            },
+            {
+                "rule": "DisasterAreaResidencyRule",
+                "succeeded": True,
+                "text": DisasterAreaResidencyRule.worked_eligible_finding
+            },
+            {
+                "rule": "IncomeAndResourceRule",
+                "succeeded": True,
+                "text": "Disaster Gross Income 480.5 within limit of 500"
+            },
+        ],
+        "metrics": {"allotment": 100},
+        "state": "FL"
+    },
+    {"eligible": True, "findings": [], "metrics": {}, "state": "GU"},
+    {"message": ["'is_head_of_household' is a required property"]},
+    {"message": "Disaster 42 not found"},
+    {"index": 3, "status": 404, "message": "Disaster 42 not found"},
+]
+
+
+@pytest.mark.parametrize("body", BODIES)
+def test_render_matches_json_dumps(body):
+    assert renderer.render(body) == json.dumps(body, indent=2)
+    assert renderer.render(body, compact=True) == json.dumps(
+        body, separators=(",", ":"))
+
+
+def test_static_findings_are_pre_rendered():
+    assert ("AuthorizedRule", False, AuthorizedRule.failure_finding) in \
+        renderer.fragments
+    assert not any(rule == "IncomeAndResourceRule"
+                   for (rule, succeeded, text) in renderer.fragments)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", ["/", "/eligibility"])
+def test_compact_responses(client, path):
+    disaster = factories.DisasterFactory(uses_DSED=True)
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    payload["disaster_id"] = disaster.id
+
+    pretty = client.post(path, data=payload, content_type="application/json")
+    assert pretty.content.decode() == json.dumps(pretty.json(), indent=2)
+
+    for response in (
+            client.post(path + "?compact=1", data=payload,
+                        content_type="application/json"),
+            client.post(path, data=payload, content_type="application/json",
+                        HTTP_ACCEPT="application/json; indent=0")):
+        assert response.status_code == 200
+        assert response.json() == pretty.json()
+        assert response.content.decode() == json.dumps(
+            pretty.json(), separators=(",", ":"))
@@ -0,0 +1,138 @@
+import copy
+from unittest.mock import patch
+
+import pytest
+
+from . import factories
+from .test_api import GOOD_PAYLOAD
+from dsnap_rules import reference_data, views
+from dsnap_rules.disaster_cache import DisasterCache
+from dsnap_rules.models import Disaster, State
+from dsnap_rules.result_cache import ResultCache, results
+
+
+@pytest.fixture
+def payload():
+    disaster = factories.DisasterFactory(
+        state=State.objects.get(abbreviation="FL"), residency_required=False)
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    payload["disaster_id"] = disaster.id
+    return payload
+
+
+@pytest.mark.django_db
+def test_identical_payloads_are_served_from_the_cache(client, payload):
+    hits = results.hits
+    first = client.post('/', data=payload, content_type="application/json")
+    assert results.stats()["entries"] == 1
+    second = client.post('/', data=payload, content_type="application/json")
+
+    # Keys do not depend on the order of the payload's keys
+    reordered = dict(reversed(list(payload.items())))
+    with patch.object(views, "determine") as determine:
+        third = client.post('/', data=reordered,
+                            content_type="application/json")
+    determine.assert_not_called()
+
+    assert first.content == second.content == third.content
+    assert third.status_code == 200
+    assert results.hits == hits + 2
+
+
+@pytest.mark.django_db
+def test_keys_include_the_mode_and_rendering(client, payload):
+    for _ in range(2):
+        compact = client.post('/?compact=1', data=payload,
+                              content_type="application/json")
+        pretty = client.post('/', data=payload,
+                             content_type="application/json")
+        client.post('/?mode=first_failure', data=payload,
+                    content_type="application/json")
+    assert compact.content != pretty.content
+    assert compact.json() == pretty.json()
+    assert results.stats()["entries"] == 3
+
+
+@pytest.mark.django_db
+def test_only_successful_determinations_are_cached(client, payload):
+    del payload["is_head_of_household"]
+    for _ in range(2):
+        response = client.post('/', data=payload,
+                               content_type="application/json")
+        assert response.status_code == 400
+    assert results.stats()["entries"] == 0
+
+
+@pytest.mark.django_db
+def test_saving_a_disaster_invalidates_its_results(client, payload):
+    client.post('/', data=payload, content_type="application/json")
+    response = client.post('/', data=payload, content_type="application/json")
+    assert response.json()["eligible"] is True
+    assert results.stats()["entries"] == 1
+
+    disaster = Disaster.objects.get(pk=payload["disaster_id"])
+    disaster.residency_required = True
+    disaster.save()
+    assert results.stats()["entries"] == 0
+
+    payload["resided_in_disaster_area_at_disaster_time"] = False
+    payload["worked_in_disaster_area_at_disaster_time"] = False
+    response = client.post('/', data=payload, content_type="application/json")
+    assert response.json()["eligible"] is False
+
+
+@pytest.mark.django_db
+def test_keys_change_with_the_reference_data(payload):
+    disasters = DisasterCache()
+    cache = ResultCache(disasters=disasters)
+    assert cache.key(payload, "all_findings", False) is None
+
+    disasters.get(payload["disaster_id"])
+    key = cache.key(payload, "all_findings", False)
+    assert key == cache.key(copy.deepcopy(payload), "all_findings", False)
+
+    reference_data.bump_version()
+    assert cache.key(payload, "all_findings", False) is None
+    disasters.get(payload["disaster_id"])
+    assert cache.key(payload, "all_findings", False) != key
+
+
+def test_uncacheable_payloads():
+    cache = ResultCache()
+    assert cache.key([], "all_findings", False) is None
+    assert cache.key({"disaster_id": "1"}, "all_findings", False) is None
+    assert cache.key({"disaster_id": True}, "all_findings", False) is None
+    assert cache.get(None) is None
+    cache.set(None, "{}")
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResultCache(max_bytes=10)
+    cache.set((1, "a"), "aaaa")
+    cache.set((1, "b"), "bbbb")
+    assert cache.get((1, "a")) == "aaaa"
+    cache.set((2, "c"), "cccc")
+
+    assert cache.get((1, "b")) is None
+    assert cache.get((1, "a")) == "aaaa"
+    assert cache.get((2, "c")) == "cccc"
+    assert cache.stats() == {
+        "entries": 2, "bytes": 8, "hits": 3, "misses": 1, "evictions": 1,
+    }
+
+    # Entries larger than the cache are not stored
+    cache.set((2, "d"), "d" * 11)
+    assert cache.get((2, "d")) is None
+
+    cache.invalidate(1)
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == 4
+    cache.invalidate()
+    assert cache.stats()["bytes"] == 0
+
+
+def test_zero_max_bytes_disables_the_cache():
+    cache = ResultCache(max_bytes=0)
+    cache.set((1, "a"), "a")
+    assert cache.get((1, "a")) is None
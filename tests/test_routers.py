@@ -0,0 +1,110 @@
+import copy
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import factories
+from .test_api import GOOD_PAYLOAD
+from dsnap_rules import reference_data, routers
+from dsnap_rules.disaster_cache import disasters
+from dsnap_rules.models import Disaster, ReferenceDataVersion
+from dsnap_rules.routers import ReplicaRouter, replica_reads
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.REPLICA_DATABASES = ["replica1", "replica2"]
+    settings.REPLICA_LAG = 10
+    return settings.REPLICA_DATABASES
+
+
+def changed(seconds_ago):
+    ReferenceDataVersion.objects.update_or_create(
+        pk=1, defaults={
+            "updated_at": timezone.now() - timedelta(seconds=seconds_ago)})
+    cache.delete(reference_data.VERSION_KEY)
+
+
+@pytest.mark.django_db
+def test_reads_go_to_replicas_inside_replica_reads(replicas):
+    changed(60)
+    router = ReplicaRouter()
+
+    assert router.db_for_read(Disaster) is None
+    with replica_reads():
+        assert router.db_for_read(Disaster) in replicas
+        # The marker of recent changes always comes from the primary
+        assert router.db_for_read(ReferenceDataVersion) is None
+    assert router.db_for_read(Disaster) is None
+    assert router.db_for_write(Disaster) == "default"
+
+
+@pytest.mark.django_db
+def test_reads_go_to_primary_after_recent_changes(replicas):
+    router = ReplicaRouter()
+    factories.DisasterFactory()
+
+    with replica_reads():
+        assert router.db_for_read(Disaster) is None
+        changed(11)
+        assert router.db_for_read(Disaster) in replicas
+
+
+@pytest.mark.django_db
+def test_no_replicas(settings):
+    settings.REPLICA_DATABASES = []
+    changed(60)
+    with replica_reads():
+        assert ReplicaRouter().db_for_read(Disaster) is None
+
+
+def test_replicas_are_not_migrated(replicas):
+    router = ReplicaRouter()
+    assert router.allow_migrate("replica1", "dsnap_rules") is False
+    assert router.allow_migrate("default", "dsnap_rules") is None
+
+
+@pytest.mark.django_db
+def test_reference_data_loads_use_replicas(client, replicas):
+    disaster = factories.DisasterFactory()
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    payload["disaster_id"] = disaster.id
+    changed(60)
+
+    # Every replica is the primary database here
+    with patch.object(routers.random, "choice",
+                      return_value="default") as choice:
+        # The four queries of the snapshot, which /disasters also reads
+        client.post('/eligibility', data=payload,
+                    content_type="application/json")
+        assert choice.call_count == 4
+        client.get('/disasters')
+        assert choice.call_count == 4
+        client.get('/')
+        assert choice.call_count == 5
+    assert all(call.args[0] == replicas for call in choice.call_args_list)
+
+
+@pytest.mark.skipif("replica1" not in django_settings.DATABASES,
+                    reason="Set REPLICA_DATABASE_URLS to test a replica")
+@pytest.mark.django_db(transaction=True, databases=["default", "replica1"])
+def test_replica_database():
+    disaster = factories.DisasterFactory()
+    changed(60)
+
+    disasters.invalidate()
+    with CaptureQueriesContext(connections["replica1"]) as replica:
+        disasters.get(disaster.id)
+    assert len(replica) == 4
+
+    disaster.title = "Renamed"
+    disaster.save()
+    with CaptureQueriesContext(connections["replica1"]) as replica:
+        assert disasters.get(disaster.id).title == "Renamed"
+    assert len(replica) == 0
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import factories
+from .test_reference_data import active_disaster
+from dsnap_rules import reference_data
+from dsnap_rules.models import Disaster
+from dsnap_rules.serializers import DisasterSerializer
+from dsnap_rules.snapshot import Snapshot, serialize, snapshots
+
+
+@pytest.mark.django_db
+def test_load_reads_in_bulk(django_assert_num_queries):
+    for _ in range(3):
+        active_disaster()
+    factories.DisasterFactory()
+
+    with django_assert_num_queries(4):
+        snapshot = Snapshot.load(7)
+    assert snapshot.version == 7
+    assert len(snapshot.disasters) == 4
+
+
+@pytest.mark.django_db
+def test_records_match_the_models():
+    disaster, period = active_disaster()
+    record = Snapshot.load(1).get(disaster.id)
+
+    assert record.state.abbreviation == record.state_id == \
+        disaster.state.abbreviation
+    assert record.uses_DSED == disaster.uses_DSED
+    assert [p.id for p in record.application_periods] == [period.id]
+    assert {c.name for c in record.application_periods[0].counties} == {
+        c.name for c in period.counties.all()}
+    with pytest.raises(AttributeError):
+        record.uses_DSED = not record.uses_DSED
+    with pytest.raises(Disaster.DoesNotExist):
+        Snapshot.load(1).get(disaster.id + 1)
+
+
+@pytest.mark.django_db
+def test_serialize_matches_the_serializer():
+    disaster, _ = active_disaster()
+    factories.ApplicationPeriodFactory(disaster=disaster)
+    record = Snapshot.load(1).get(disaster.id)
+
+    def encode(data):
+        return json.dumps(data, cls=DjangoJSONEncoder)
+
+    assert encode(serialize(record)) == encode(
+        DisasterSerializer(Disaster.objects.get(pk=disaster.id)).data)
+
+
+@pytest.mark.django_db
+def test_new_versions_replace_the_snapshot(django_assert_num_queries):
+    disaster = factories.DisasterFactory(title="Before")
+    first = snapshots.current()
+    with django_assert_num_queries(0):
+        assert snapshots.current() is first
+
+    Disaster.objects.filter(pk=disaster.id).update(title="After")
+    reference_data.bump_version()
+    second = snapshots.current()
+    assert second is not first
+    assert second.version > first.version
+    assert second.get(disaster.id).title == "After"
+    # Readers holding the old snapshot still see it whole
+    assert first.get(disaster.id).title == "Before"
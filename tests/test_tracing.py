@@ -0,0 +1,122 @@
+import copy
+import json
+from unittest.mock import patch
+
+import pytest
+
+from . import factories
+from .test_api import GOOD_PAYLOAD
+from dsnap_rules import eligibility, rules, tracing
+from dsnap_rules.dsnap_rules import ELIGIBILITY_RULES
+from dsnap_rules.models import State
+
+
+@pytest.fixture
+def spans_path(tmp_path, monkeypatch):
+    """Trace every determination to a file, with a plan compiled while the
+    rule hook is added.
+    """
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(tracing, "tracer", tracing.Tracer(
+        [tracing.JSONLinesExporter(str(path))]))
+    rules.add_step_hook(tracing.rule_hook)
+    try:
+        monkeypatch.setattr(
+            eligibility, "ELIGIBILITY_PLAN", ELIGIBILITY_RULES.compile())
+    finally:
+        rules.remove_step_hook(tracing.rule_hook)
+    return path
+
+
+@pytest.fixture
+def payload():
+    disaster = factories.DisasterFactory(
+        state=State.objects.get(abbreviation="FL"))
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    payload["disaster_id"] = disaster.id
+    return payload
+
+
+def read_spans(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_disabled_by_default(client):
+    assert tracing.tracer is None
+    with tracing.trace("determination") as trace:
+        assert trace is None
+        assert tracing.span("calculator") is tracing.NULL_CONTEXT
+
+
+@pytest.mark.django_db
+def test_determination_spans(client, spans_path, payload):
+    response = client.post('/', data=payload, content_type="application/json")
+    assert response.status_code == 200
+
+    spans = read_spans(spans_path)
+    by_name = {span["name"]: span for span in spans}
+    root = by_name["determination"]
+    assert root["parent_id"] is None
+    assert root["attributes"] == {"mode": "all_findings", "status": 200}
+    assert {span["trace_id"] for span in spans} == {root["trace_id"]}
+
+    rule_names = [rule.__class__.__name__ for rule in ELIGIBILITY_RULES.rules]
+    assert set(by_name) == {
+        "determination", "validate", "disaster", "evaluate", "render",
+        "calculator", *rule_names}
+    for name in ["validate", "disaster", "evaluate", "render", *rule_names]:
+        assert by_name[name]["parent_id"] == root["span_id"]
+    assert by_name["calculator"]["parent_id"] == \
+        by_name["IncomeAndResourceRule"]["span_id"]
+    assert by_name["AuthorizedRule"]["attributes"] == {"succeeded": True}
+    assert all(span["start_time"] <= span["end_time"] for span in spans)
+
+    # A cached determination is a single span
+    client.post('/', data=payload, content_type="application/json")
+    spans = read_spans(spans_path)[len(spans):]
+    assert [span["name"] for span in spans] == ["determination"]
+    assert spans[0]["attributes"]["cached"] is True
+
+
+@pytest.mark.django_db
+def test_failed_exports_do_not_fail_requests(
+        client, spans_path, payload, caplog):
+    # The spans file cannot be created
+    spans_path.mkdir()
+    response = client.post('/', data=payload, content_type="application/json")
+    assert response.status_code == 200
+    assert "Failed to export trace" in caplog.text
+
+
+def test_sampling():
+    tracer = tracing.Tracer([], sample_rate=0.25)
+    with patch.object(tracing.random, "random", side_effect=[0.2, 0.3]):
+        assert tracer.sample()
+        assert not tracer.sample()
+
+    tracer = tracing.Tracer([], max_per_second=2)
+    with patch.object(tracing.time, "monotonic", return_value=100.5):
+        assert [tracer.sample() for _ in range(3)] == [True, True, False]
+    with patch.object(tracing.time, "monotonic", return_value=101.0):
+        assert tracer.sample()
+
+
+def test_configure(settings, tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "tracer", None)
+    settings.TRACING_SAMPLE_RATE = 0.5
+    settings.TRACING_EXPORTERS = []
+    tracing.configure()
+    assert tracing.tracer is None
+
+    settings.TRACING_EXPORTERS = [
+        ("dsnap_rules.tracing.JSONLinesExporter",
+         {"path": str(tmp_path / "spans.jsonl")})]
+    try:
+        tracing.configure()
+        assert tracing.tracer.sample_rate == 0.5
+        assert isinstance(tracing.tracer.exporters[0],
+                          tracing.JSONLinesExporter)
+        assert rules.STEP_HOOKS == [tracing.rule_hook]
+    finally:
+        rules.remove_step_hook(tracing.rule_hook)
@@ -1,4 +1,26 @@
-from dsnap_rules.validate import validate
+import copy
+
+import pytest
+
+from dsnap_rules.validate import VALIDATOR, fast_validate, validate
+
+GOOD_DATA = {
+    "disaster_id": 42,
+    "disaster_expenses": {
+        "food_loss": 0
+    },
+    "is_head_of_household": True,
+    "has_lost_or_inaccessible_income": False,
+    "has_inaccessible_liquid_resources": False,
+    "purchased_or_plans_to_purchase_food": True,
+    "resided_in_disaster_area_at_disaster_time": True,
+    "worked_in_disaster_area_at_disaster_time": False,
+    "size_of_household": 2,
+    "total_take_home_income": 10,
+    "accessible_liquid_resources": 0,
+    "receives_SNAP_benefits": False,
+    "residence_state": "CA",
+}
 
 
 def test_good_data():
@@ -42,3 +64,42 @@ def test_missing_required_field():
         "'worked_in_disaster_area_at_disaster_time' is a required property",
         "'receives_SNAP_benefits' is a required property"
     ])
+
+
+def test_fast_path_accepts_good_data():
+    assert fast_validate(GOOD_DATA) is True
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [
+        ("size_of_household", True),
+        ("size_of_household", 0),
+        ("size_of_household", 2.0),
+        ("size_of_household", "2"),
+        ("total_take_home_income", -1),
+        ("total_take_home_income", 10.5),
+        ("is_head_of_household", 1),
+        ("residence_state", None),
+        ("disaster_expenses", {"food_loss": -5}),
+        ("disaster_expenses", {"pets": 5}),
+        ("disaster_expenses", []),
+        ("unknown_field", 1),
+    ])
+def test_fast_path_agrees_with_validator(field, value):
+    data = copy.deepcopy(GOOD_DATA)
+    data[field] = value
+
+    expected_messages = [
+        error.message for error in VALIDATOR.iter_errors(data)]
+    if fast_validate(data):
+        assert expected_messages == []
+    valid, messages = validate(data)
+    assert valid is (not expected_messages)
+    assert messages == expected_messages
+
+
+def test_fast_path_rejects_non_objects():
+    assert fast_validate([GOOD_DATA]) is False
+    assert validate([GOOD_DATA]) == (
+        False, [f"{[GOOD_DATA]!r} is not of type 'object'"])
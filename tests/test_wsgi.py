@@ -0,0 +1,100 @@
+import copy
+import io
+import json
+
+import pytest
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+
+from . import factories
+from .test_api import GOOD_PAYLOAD
+from rules_service.wsgi import application
+
+
+def wsgi_request(application, path, payload, **headers):
+    body = json.dumps(payload).encode()
+    environ = {
+        'REQUEST_METHOD': 'POST',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.url_scheme': 'http',
+        'wsgi.errors': io.StringIO(),
+        **headers,
+    }
+    started = {}
+
+    def start_response(status, response_headers):
+        started['status'] = status
+        started['headers'] = {
+            name.lower(): value for name, value in response_headers}
+
+    response = application(environ, start_response)
+    content = b''.join(response)
+    response.close()
+    return started['status'], started['headers'], content
+
+
+@pytest.fixture
+def keep_connections():
+    """Keep the test transaction's connection open across WSGI requests, as
+    the Django test client does."""
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    yield
+    request_started.connect(close_old_connections)
+    request_finished.connect(close_old_connections)
+
+
+@pytest.fixture
+def eligible_payload(db):
+    disaster = factories.DisasterFactory(uses_DSED=True)
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    payload["disaster_id"] = disaster.id
+    payload["residence_state"] = disaster.state.abbreviation
+    return payload
+
+
+def test_eligibility_route_matches_index(
+        client, keep_connections, eligible_payload):
+    status, headers, content = wsgi_request(
+        application, '/eligibility', eligible_payload,
+        HTTP_ORIGIN='https://dsnap-registration.app.cloud.gov')
+
+    assert status == '200 OK'
+    index = client.post('/', data=eligible_payload,
+                        content_type="application/json")
+    assert json.loads(content) == index.json()
+    assert 'access-control-allow-origin' in headers
+    assert headers['x-frame-options'] == 'DENY'
+
+
+def test_eligibility_route_validates_the_host(
+        keep_connections, eligible_payload):
+    status, _, _ = wsgi_request(
+        application, '/eligibility', eligible_payload,
+        HTTP_HOST='attacker.example.com')
+    assert status.startswith('400')
+
+
+def test_invalid_payload(client):
+    response = client.post('/eligibility', data="{not json",
+                           content_type="application/json")
+    assert response.status_code == 400
+    assert response.json() == {"message": "Invalid JSON"}
+
+    payload = copy.deepcopy(GOOD_PAYLOAD)
+    del payload["is_head_of_household"]
+    response = client.post('/eligibility', data=payload,
+                           content_type="application/json")
+    assert response.status_code == 400
+    assert response.json() == {
+        "message": ["'is_head_of_household' is a required property"]
+    }